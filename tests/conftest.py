@@ -0,0 +1,39 @@
+"""Load unified_cobalt.py with the globals Nighty injects, exposing its helpers."""
+import os
+import types
+
+import pytest
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "unified_cobalt.py")
+
+
+class _Bot:
+    def command(self, *args, **kwargs):
+        return lambda func: func
+
+
+def load_script(config=None):
+    """Run the script body and return its local names (helpers and commands)"""
+    with open(SCRIPT_PATH, encoding="utf-8") as f:
+        source = f.read()
+    # Capture the locals of unified_cobalt_script() once everything is defined
+    source = source.replace("\n    @bot.command(name=\"cobalt\"", "\n    _EXPORT.update(locals())\n    @bot.command(name=\"cobalt\"", 1)
+    config = {} if config is None else config
+    exported = {}
+    namespace = {
+        "nightyScript": lambda **kwargs: (lambda func: func),
+        "getConfigData": lambda: config,
+        "updateConfigData": config.__setitem__,
+        "bot": _Bot(),
+        "discord": types.SimpleNamespace(File=lambda *args, **kwargs: None),
+        "forwardEmbedMethod": None,
+        "_EXPORT": exported,
+        "__name__": "unified_cobalt_test",
+    }
+    exec(compile(source, SCRIPT_PATH, "exec"), namespace)
+    return exported
+
+
+@pytest.fixture(scope="session")
+def script():
+    return load_script()
@@ -0,0 +1,43 @@
+import asyncio
+
+from aiohttp import web
+
+
+def test_instance_info_is_cached_but_health_is_not(script):
+    state = {"up": True, "version": "10.0"}
+    gets = []
+
+    async def info(request):
+        if not state["up"]:
+            return web.Response(status=503)
+        if request.method == "GET":
+            gets.append(request.path)
+        return web.json_response({"cobalt": {"version": state["version"]}})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/", info)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+        try:
+            first = await script["get_cobalt_info"](url)
+            state["version"] = "10.1"
+            cached = await script["get_cobalt_info"](url)
+            state["up"] = False
+            down = await script["get_cobalt_info"](url)
+            state["up"] = True
+            back = await script["get_cobalt_info"](url)
+        finally:
+            await (await script["get_session"]()).close()
+            await runner.cleanup()
+        return first, cached, down, back
+
+    first, cached, down, back = asyncio.run(main())
+    assert first == (200, {"cobalt": {"version": "10.0"}})
+    assert cached == first
+    assert down == (503, None)
+    assert back == (200, {"cobalt": {"version": "10.1"}})
+    assert len(gets) == 2
@@ -0,0 +1,41 @@
+import asyncio
+import os
+import stat
+import sys
+
+import pytest
+
+from conftest import load_script
+
+FAKE_FFMPEG = """#!{python}
+import sys
+with open({log!r}, "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+with open(sys.argv[-1], "wb") as out:
+    out.write(b"GIF89a" + b"x" * 1000)
+"""
+
+
+@pytest.fixture
+def host_ffmpeg(tmp_path, monkeypatch):
+    """Put a fake ffmpeg on PATH that logs its arguments, and load the script using it"""
+    log = tmp_path / "ffmpeg.log"
+    ffmpeg = tmp_path / "bin" / "ffmpeg"
+    ffmpeg.parent.mkdir()
+    ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable, log=str(log)))
+    ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{ffmpeg.parent}{os.pathsep}{os.environ['PATH']}")
+    script = load_script({
+        "unified_cobalt_path": str(tmp_path / "downloads"),
+        "unified_cobalt_host_ffmpeg": True,
+    })
+    video = tmp_path / "in.mp4"
+    video.write_bytes(b"video")
+    return script, str(video), log
+
+
+@pytest.mark.parametrize("speed, expected", [(4.0, "fps=50,"), (2.0, "fps=30,"), (0.5, "fps=7.5,")])
+def test_speed_frame_rate_is_capped(host_ffmpeg, speed, expected):
+    script, video, log = host_ffmpeg
+    asyncio.run(script["convert_to_gif"](video, 15, "480:-1", [], False, speed))
+    assert f"setpts=PTS/{speed}," + expected in log.read_text()
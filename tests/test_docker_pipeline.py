@@ -0,0 +1,27 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+def open_fds():
+    return set(os.listdir("/proc/self/fd"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc/self/fd")
+@pytest.mark.parametrize("failing", ["producer", "consumer"])
+def test_failed_start_closes_pipe(script, failing):
+    good = [sys.executable, "-c", "pass"]
+    missing = ["/nonexistent/localcobalt-tool"]
+    producer, consumer = (missing, good) if failing == "producer" else (good, missing)
+    before = open_fds()
+    with pytest.raises(OSError):
+        asyncio.run(script["run_docker_pipeline"](producer, consumer))
+    assert open_fds() <= before
+
+
+def test_pipeline_output(script):
+    producer = [sys.executable, "-c", "print('hello')"]
+    consumer = [sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read().upper())"]
+    assert asyncio.run(script["run_docker_pipeline"](producer, consumer)) == "HELLO\n"
@@ -0,0 +1,11 @@
+import shutil
+
+from conftest import load_script
+
+
+def test_download_dir_is_recreated_after_deletion(tmp_path):
+    script = load_script({"unified_cobalt_path": str(tmp_path / "downloads")})
+    path = script["ensure_download_dir"](workdir=True)
+    shutil.rmtree(tmp_path / "downloads")
+    assert script["ensure_download_dir"](workdir=True) == path
+    assert (tmp_path / "downloads" / "workdir").is_dir()
@@ -0,0 +1,55 @@
+def test_cobalt_instance_urls_are_tunnels(script):
+    assert script["is_tunnel_url"]("http://localhost:9000/tunnel?id=abc&exp=1")
+    assert script["is_tunnel_url"]("https://cobalt.example.com/api/tunnel?id=abc")
+
+
+def test_direct_urls_are_not_tunnels(script):
+    assert not script["is_tunnel_url"]("https://cdn.example.com/video.mp4")
+    assert not script["is_tunnel_url"]("http://localhost:90001/video.mp4")
+
+
+def test_reuse_existing_defaults_on(script):
+    assert script["CONFIG_DEFAULTS"][script["REUSE_EXISTING_KEY"]] is True
+    assert script["reuse_existing"] is True
+
+
+def test_reuse_is_keyed_on_the_source_url(tmp_path):
+    import asyncio
+
+    from aiohttp import web
+
+    from conftest import load_script
+
+    script = load_script({"unified_cobalt_path": str(tmp_path), "unified_cobalt_persistent": True})
+    bodies = {"/a.mp4": b"first-clip", "/b.mp4": b"other-clip"}
+    hits = []
+
+    async def serve(request):
+        if request.method == "GET":
+            hits.append(request.path)
+        return web.Response(body=bodies[request.path])
+
+    async def main():
+        app = web.Application()
+        app.router.add_route("*", "/{name}", serve)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+        try:
+            first = await script["download_file"](f"{base}/a.mp4", "input_video.mp4")
+            again = await script["download_file"](f"{base}/a.mp4", "input_video.mp4")
+            other = await script["download_file"](f"{base}/b.mp4", "input_video.mp4")
+            with open(other, "rb") as f:
+                content = f.read()
+        finally:
+            await (await script["get_session"]()).close()
+            await runner.cleanup()
+        return first, again, content
+
+    first, again, content = asyncio.run(main())
+    assert first == again
+    # Same name and size, different URL: downloaded again, not reused
+    assert content == b"other-clip"
+    assert hits == ["/a.mp4", "/b.mp4"]
@@ -0,0 +1,14 @@
+from conftest import load_script
+
+
+def test_stored_none_falls_back_to_defaults_after_refresh():
+    config = {}
+    script = load_script(config)
+    names = ("lb_limit_mb", "lb_limit_bytes", "ffmpeg_hwaccel", "lb_expiry", "reuse_existing")
+    startup = {name: script[name] for name in names}
+    for key in ("LITTERBOX_SIZE_THRESHOLD_MB_KEY", "FFMPEG_HWACCEL_KEY", "LITTERBOX_EXPIRY_KEY", "REUSE_EXISTING_KEY"):
+        config[script[key]] = None
+    script["refresh_config"]()
+    # refresh_config rebinds the script's cached names, which it shares through its closure
+    cells = dict(zip(script["refresh_config"].__code__.co_freevars, script["refresh_config"].__closure__))
+    assert {name: cells[name].cell_contents for name in names} == startup
@@ -0,0 +1,26 @@
+def test_apostrophes_in_url_are_kept(script):
+    url, flags = script["tokenize_args"]("https://site.com/it's-bob's-video -fps=10")
+    assert url == "https://site.com/it's-bob's-video"
+    assert flags["fps"] == "10"
+
+
+def test_backslashes_in_url_are_kept(script):
+    url, _ = script["tokenize_args"]("https://a.b/x\\y")
+    assert url == "https://a.b/x\\y"
+
+
+def test_unbalanced_quote_in_url_is_kept(script):
+    url, _ = script["tokenize_args"]("https://site.com/bob's -optimize")
+    assert url == "https://site.com/bob's"
+
+
+def test_fully_quoted_url_is_unquoted(script):
+    url, _ = script["tokenize_args"]('"https://site.com/a b.mp4" -fps=10')
+    assert url == "https://site.com/a b.mp4"
+    url, _ = script["tokenize_args"]("'https://site.com/video.mp4'")
+    assert url == "https://site.com/video.mp4"
+
+
+def test_mismatched_outer_quotes_are_kept(script):
+    url, _ = script["tokenize_args"]("'https://site.com/video.mp4\"")
+    assert url == "'https://site.com/video.mp4\""
@@ -0,0 +1,33 @@
+import asyncio
+import stat
+import sys
+
+from conftest import load_script
+
+FAKE_FFMPEG = """#!{python}
+print("ffmpeg version 6.1.1-static Copyright (c) 2000-2023")
+"""
+
+
+def test_status_probes_the_host_binary_and_reports_failures_per_tool(tmp_path, monkeypatch):
+    ffmpeg = tmp_path / "bin" / "ffmpeg"
+    ffmpeg.parent.mkdir()
+    ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IEXEC)
+    # No docker on PATH, only the host ffmpeg
+    monkeypatch.setenv("PATH", str(ffmpeg.parent))
+    script = load_script({
+        "unified_cobalt_path": str(tmp_path / "downloads"),
+        "unified_cobalt_host_ffmpeg": True,
+    })
+
+    async def main():
+        return await asyncio.gather(
+            script["tool_status"]("ffmpeg", "🔄", "-version"),
+            script["tool_status"]("gifsicle", "🎨", "--version"),
+        )
+
+    ffmpeg_status, gifsicle_status = asyncio.run(main())
+    assert ffmpeg_status.startswith("**🔄 Host FFmpeg**: ✅ Working")
+    assert "ffmpeg version 6.1" in ffmpeg_status
+    assert gifsicle_status.startswith("**🎨 Docker Giflossy**: ❌ Not working")
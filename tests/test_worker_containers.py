@@ -0,0 +1,27 @@
+import asyncio
+import os
+import stat
+import sys
+
+from conftest import load_script
+
+FAKE_DOCKER = """#!{python}
+import sys
+with open({log!r}, "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+"""
+
+
+def test_worker_mounts_an_absolute_download_path(tmp_path, monkeypatch):
+    log = tmp_path / "docker.log"
+    docker = tmp_path / "bin" / "docker"
+    docker.parent.mkdir()
+    docker.write_text(FAKE_DOCKER.format(python=sys.executable, log=str(log)))
+    docker.chmod(docker.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{docker.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.chdir(tmp_path)
+    script = load_script({"unified_cobalt_path": "downloads", "unified_cobalt_workers": True})
+
+    asyncio.run(script["ensure_worker_container"]("ffmpeg", "jrottenberg/ffmpeg:latest", []))
+    run = log.read_text().splitlines()[-1].split()
+    assert run[run.index("-v") + 1] == f"{tmp_path / 'downloads'}:{script['WORKER_MOUNT']}"
@@ -4,15 +4,21 @@
     description="All-in-one tool for downloading media and converting to GIFs",
     usage="""<p>c <url> [-720p] [-wav] [-audio] (Cobalt downloader)
 <p>cg <url> [-fps=<fps>] [-scale=<width>:-1] [-time=<start>-<end>] [-optimize] [-720p] (Cobalt GIF converter)
-<p>v2g <url or attachment> [-fps=<fps>] [-scale=<width>:-1] [-time=<start>-<end>] [-optimize] [-720p] [-speed=<factor>] (Direct FFmpeg GIF converter)
+<p>v2g <url or attachment> [-fps=<fps>] [-scale=<width>:-1] [-time=<start>-<end>] [-optimize] [-720p] [-speed=<factor>] [-fit] (Direct FFmpeg GIF converter)
 <p>v2mp3 <url or attachment> [-time=<start>-<end>] (Video to MP3 converter)
 <p>c|cg|v2g|v2mp3 url <your_local_cobalt_url>
 <p>c|cg|v2g|v2mp3 path <download_path>
 <p>c|cg|v2g|v2mp3 debug
 <p>c|cg|v2g|v2mp3 persistent
+<p>c|cg|v2g|v2mp3 reuse (Toggle reusing files already downloaded from the same link)
+<p>c|cg|v2g|v2mp3 workers (Toggle long-lived ffmpeg/gifsicle containers)
+<p>c|cg|v2g|v2mp3 hostffmpeg|hostgifsicle (Toggle using ffmpeg/gifsicle installed on the host)
 <p>c|cg|v2g|v2mp3 lb <1|12|24|72> (Set litterbox expiry time in hours)
 <p>c|cg|v2g|v2mp3 limit <size_mb> (Set file size limit before using Litterbox)
-<p>c|cg|v2g|v2mp3 status"""
+<p>c|cg|v2g|v2mp3 jobs <n|auto> (Set how many ffmpeg/gifsicle jobs run at once)
+<p>c|cg|v2g|v2mp3 threads <n|auto> (Set ffmpeg threads per job)
+<p>c|cg|v2g|v2mp3 hwaccel <auto|cuda|vaapi|none|detect> (Set FFmpeg hardware decoding)
+<p>c|cg|v2g|v2mp3 status [refresh]"""
 )
 def unified_cobalt_script():
     """
@@ -104,11 +110,12 @@ def unified_cobalt_script():
     - FPS: -fps=<number> (default: 15)
     - Scale: -scale=<width>:-1 (default: 480:-1)
     - Time: -time=<start>-<end> (in seconds)
-    - Optimize: -optimize (reduces file size)
+    - Optimize: -optimize (reduces file size with gifsicle -O3 --lossy=80)
     - Loop: -loop=<number> (default: 0, -1 for infinite)
     - Dither: -dither=<method> (default: bayer:bayer_scale=5)
     - Colors: -colors=<number> (default: 256)
     - Speed: -speed=<factor> (default: 1.0, e.g. 0.5 for half speed, 2.0 for double speed)
+    - Fit: -fit (stops encoding once the GIF reaches the upload limit, so long clips are cut short instead of going to litterbox)
     
     EXAMPLES:
     1. Download a video in 720p quality:
@@ -144,14 +151,45 @@ def unified_cobalt_script():
     - Persistent storage keeps files in the configured download path
     """
     import json
+    import math
     import aiohttp
     import asyncio
+    import atexit
+    import functools
+    import itertools
     import os
     import re
+    import shlex
+    import subprocess
     import tempfile
-    from pathlib import Path
+    import time
     import shutil
     from datetime import datetime
+    from urllib.parse import urlsplit
+
+    # orjson is optional; fall back to the standard library json module
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+    # aiodns is optional; without it aiohttp resolves hostnames in a thread pool
+    try:
+        import aiodns
+    except ImportError:
+        aiodns = None
+
+    def json_dumps(obj):
+        """Serialize obj to JSON bytes"""
+        if orjson is not None:
+            return orjson.dumps(obj)
+        return json.dumps(obj).encode()
+
+    def json_loads(data):
+        """Parse JSON from bytes or str"""
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
     
     # Config keys
     COBALT_URL_KEY = "unified_cobalt_url"
@@ -160,308 +198,997 @@ def unified_cobalt_script():
     PERSISTENT_STORAGE_KEY = "unified_cobalt_persistent"
     LITTERBOX_EXPIRY_KEY = "unified_cobalt_litterbox_expiry"
     LITTERBOX_SIZE_THRESHOLD_MB_KEY = "unified_cobalt_limit_mb"
+    FFMPEG_HWACCEL_KEY = "unified_cobalt_hwaccel"
+    WORKER_CONTAINERS_KEY = "unified_cobalt_workers"
+    HOST_FFMPEG_KEY = "unified_cobalt_host_ffmpeg"
+    DOCKER_JOBS_KEY = "unified_cobalt_jobs"
+    FFMPEG_THREADS_KEY = "unified_cobalt_ffmpeg_threads"
+    HOST_GIFSICLE_KEY = "unified_cobalt_host_gifsicle"
+    REUSE_EXISTING_KEY = "unified_cobalt_reuse_existing"
     
-    # Initialize configuration
-    if getConfigData().get(COBALT_URL_KEY) is None:
-        updateConfigData(COBALT_URL_KEY, "http://localhost:9000")
-    
-    if getConfigData().get(DOWNLOAD_PATH_KEY) is None:
-        default_path = os.path.join(tempfile.gettempdir(), "unified_cobalt")
-        updateConfigData(DOWNLOAD_PATH_KEY, default_path)
-    
-    if getConfigData().get(DEBUG_ENABLED_KEY) is None:
-        updateConfigData(DEBUG_ENABLED_KEY, False)
-    
-    if getConfigData().get(PERSISTENT_STORAGE_KEY) is None:
-        updateConfigData(PERSISTENT_STORAGE_KEY, False)
+    # Default configuration values, written only for keys that are missing
+    CONFIG_DEFAULTS = {
+        COBALT_URL_KEY: "http://localhost:9000",
+        DOWNLOAD_PATH_KEY: os.path.join(tempfile.gettempdir(), "unified_cobalt"),
+        DEBUG_ENABLED_KEY: False,
+        PERSISTENT_STORAGE_KEY: False,
+        LITTERBOX_EXPIRY_KEY: "24h",  # Default to 24 hours
+        LITTERBOX_SIZE_THRESHOLD_MB_KEY: 8,
+        FFMPEG_HWACCEL_KEY: "auto",
+        WORKER_CONTAINERS_KEY: False,
+        HOST_FFMPEG_KEY: False,
+        HOST_GIFSICLE_KEY: False,
+        REUSE_EXISTING_KEY: True,
+    }
 
-    if getConfigData().get(LITTERBOX_EXPIRY_KEY) is None:
-        updateConfigData(LITTERBOX_EXPIRY_KEY, "24h")  # Default to 24 hours
+    # Initialize configuration from one read; the defaults written are merged
+    # into the snapshot so the cached values below don't need a second read
+    config = dict(getConfigData() or {})
+    missing = {key: value for key, value in CONFIG_DEFAULTS.items() if config.get(key) is None}
+    for key, value in missing.items():
+        updateConfigData(key, value)
+    config.update(missing)
+
+    # Config key enabling the host binary for each tool
+    HOST_TOOL_KEYS = {"ffmpeg": HOST_FFMPEG_KEY, "gifsicle": HOST_GIFSICLE_KEY}
+
+    # Sizes are shown and configured in MB (MiB)
+    BYTES_PER_MB = 1024 * 1024
+
+    # Parallel conversions share the CPUs: half of them run docker jobs by
+    # default, and each ffmpeg gets an equal share of threads
+    CPU_COUNT = os.cpu_count() or 2
+
+    # Cached configuration, set only by refresh_config() below:
+    # debug flag, so debug_log doesn't read the config on every call
+    debug_logging = None
+    # Litterbox limit in MB (for messages) and bytes (for size checks)
+    lb_limit_mb = None
+    lb_limit_bytes = None
+    # FFmpeg hardware decoding mode
+    ffmpeg_hwaccel = None
+    # Paths and URLs read on every download or upload
+    cobalt_base_url = None
+    base_download_path = None
+    lb_expiry = None
+    keep_files = None
+    reuse_existing = None
+    # Run ffmpeg/gifsicle with docker exec in long-lived containers instead of docker run
+    use_workers = None
+    # Tools run from binaries installed on the host instead of their docker images
+    host_tools = None
+    # Cap on simultaneous docker jobs so parallel conversions don't oversubscribe
+    # the CPU, and the ffmpeg thread count (both configurable)
+    docker_jobs = None
+    docker_semaphore = None
+    ffmpeg_threads = None
+
+    # Helper function to reload cached configuration values
+    def refresh_config(config=None):
+        """Refresh cached config values at startup and after a config command changes them"""
+        nonlocal debug_logging, lb_limit_mb, lb_limit_bytes, ffmpeg_hwaccel, use_workers, host_tools
+        nonlocal docker_jobs, docker_semaphore, ffmpeg_threads
+        nonlocal cobalt_base_url, base_download_path, lb_expiry, keep_files, reuse_existing
+        if config is None:
+            config = getConfigData() or {}
+        # A stored None falls back to the default like a missing key
+        cobalt_base_url = config.get(COBALT_URL_KEY) or "http://localhost:9000"
+        base_download_path = config.get(DOWNLOAD_PATH_KEY)
+        lb_expiry = config.get(LITTERBOX_EXPIRY_KEY) or "24h"
+        keep_files = bool(config.get(PERSISTENT_STORAGE_KEY))
+        reuse_existing = config.get(REUSE_EXISTING_KEY) is not False
+        debug_logging = bool(config.get(DEBUG_ENABLED_KEY))
+        lb_limit_mb = config.get(LITTERBOX_SIZE_THRESHOLD_MB_KEY) or 8
+        lb_limit_bytes = int(float(lb_limit_mb) * BYTES_PER_MB)
+        ffmpeg_hwaccel = config.get(FFMPEG_HWACCEL_KEY) or "auto"
+        use_workers = bool(config.get(WORKER_CONTAINERS_KEY))
+        host_tools = {tool for tool, key in HOST_TOOL_KEYS.items() if config.get(key)}
+        jobs = int(config.get(DOCKER_JOBS_KEY) or max(1, CPU_COUNT // 2))
+        if jobs != docker_jobs:
+            # Jobs already running finish on the old semaphore
+            docker_jobs = jobs
+            docker_semaphore = asyncio.Semaphore(jobs)
+        ffmpeg_threads = str(config.get(FFMPEG_THREADS_KEY) or max(1, CPU_COUNT // jobs))
+
+    refresh_config(config)
+
+    # Cap on simultaneous picker item downloads
+    PICKER_DOWNLOAD_SEMAPHORE = asyncio.Semaphore(8)
+
+    # Downloads can take longer than the shared session's 60s total, so they are
+    # only cut off when the connection stalls
+    DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+    # Seconds a successful Cobalt answer is reused for the same request; tunnel
+    # links stay valid for a while, so a quick re-run skips the API round trip
+    COBALT_RESPONSE_TTL = 60
+
+    # With persistent storage, this many recent v2g URL requests remember their
+    # GIF so an identical repeat resends it without downloading or converting
+    V2G_RESULT_CACHE_SIZE = 32
+
+    # Seconds the instance info shown by status (version, services, duration
+    # limit) is reused; whether the instance is up is checked on every call
+    COBALT_INFO_TTL = 300
+
+    # Cap on simultaneous litterbox uploads
+    LITTERBOX_UPLOAD_SEMAPHORE = asyncio.Semaphore(4)
+
+    # Precompiled argument patterns
+    QUALITY_FLAG_RE = re.compile(r'-(\d+)p$')
+
+    # Expected format of each -flag=value option (integer flags share one pattern)
+    DIGITS_RE = re.compile(r'\d+')
+    FLAG_VALUE_PATTERNS = {
+        "fps": DIGITS_RE,
+        "scale": re.compile(r'\d+:-1'),
+        "time": re.compile(r'\d+(?:\.\d+)?-\d+(?:\.\d+)?'),
+        "speed": re.compile(r'\d*\.?\d+'),
+        "loop": DIGITS_RE,
+        "dither": re.compile(r'\w+'),
+        "colors": DIGITS_RE,
+    }
+
+    # Filename sanitizing
+    # Invalid characters and ASCII whitespace are replaced in one translate pass;
+    # the regex only runs for names with other (non-printable) whitespace
+    INVALID_FILENAME_CHARS = str.maketrans({ch: '_' for ch in '<>:"/\\|?* \t\n\r\v\f'})
+    WHITESPACE_RE = re.compile(r'\s+')
+    # Characters not allowed in generated GIF names; ASCII names (the common case)
+    # go through the translate table, others through the regex
+    GIF_NAME_UNSAFE_RE = re.compile(r'[^\w\-_]')
+    GIF_NAME_ASCII_TABLE = str.maketrans({
+        ch: '_' for ch in map(chr, range(128)) if GIF_NAME_UNSAFE_RE.match(ch)
+    })
+
+    # Version line of ffmpeg -version, trimmed to major.minor for status
+    FFMPEG_VERSION_RE = re.compile(r'ffmpeg version (\d+\.\d+).*')
+
+    # First URL in a previous message
+    MESSAGE_URL_RE = re.compile(r'https?://\S+')
+
+    # Cobalt flags mapped to the (option, value) they set
+    COBALT_FLAGS = {
+        "-max": ("quality", "max"),
+        "-wav": ("audio", "wav"),
+        "-ogg": ("audio", "ogg"),
+        "-opus": ("audio", "opus"),
+        "-best": ("audio", "best"),
+        "-audio": ("mode", "audio"),
+        "-mute": ("mode", "mute"),
+    }
+    # Legacy two-word flags (-audio is always the mode flag above)
+    COBALT_LEGACY_FLAGS = {"-quality": "quality", "-mode": "mode"}
+
+    # Extra docker run arguments and FFmpeg image for each hwaccel mode
+    # (GPU modes need the matching jrottenberg/ffmpeg variant and device access)
+    FFMPEG_HWACCEL_DOCKER = {
+        "auto": ([], "jrottenberg/ffmpeg"),
+        "none": ([], "jrottenberg/ffmpeg"),
+        "cuda": (["--gpus", "all"], "jrottenberg/ffmpeg:4.4-nvidia"),
+        "vaapi": (["--device", "/dev/dri"], "jrottenberg/ffmpeg:4.4-vaapi"),
+    }
+
+    GIFSICLE_IMAGE = "dylanninin/giflossy"
+
+    # Tool names shown by status
+    TOOL_NAMES = {"ffmpeg": "FFmpeg", "gifsicle": "Giflossy"}
+
+    # gifsicle --lossy levels tried in order when optimizing a GIF
+    GIFSICLE_LOSSY_LEVELS = (30, 60, 100)
+
+    # Optimizing passes also drop comments, frame names and unknown extensions
+    # (the loop count is kept)
+    GIFSICLE_STRIP_ARGS = ["--no-comments", "--no-names", "--no-extensions"]
+
+    # -optimize is skipped for GIFs below this fraction of the litterbox limit
+    GIF_OPTIMIZE_SKIP_RATIO = 0.6
+
+    # GIFs at least this far over the limit run two lossy levels side by side,
+    # since the first one is unlikely to be enough
+    GIF_PARALLEL_LOSSY_RATIO = 1.3
+
+    # Highest frame rate a sped-up cg GIF is written at: GIF delays are whole
+    # centiseconds and players stretch 1cs delays to 10cs, so frames stay at 2cs or more
+    GIF_MAX_SPEED_FPS = 50
+
+    # v2g -optimize clips longer than this (or untrimmed) use a separate palette pass,
+    # which samples frames at up to V2G_PALETTE_SAMPLE_FPS
+    V2G_TWO_PASS_MIN_SECONDS = 3
+    V2G_PALETTE_SAMPLE_FPS = 10
+    # ...and downscaled to at most this width; palette statistics don't need the
+    # full output resolution, so this pass skips the lanczos scale
+    V2G_PALETTE_SAMPLE_WIDTH = 240
+    # With persistent storage this many palettes are kept for reuse
+    V2G_PALETTE_CACHE_SIZE = 16
+
+    # v2g -time ranges longer than this are cut into segments of about
+    # V2G_SEGMENT_SECONDS, encoded in parallel (one per docker job) and merged
+    V2G_SEGMENT_MIN_SECONDS = 8
+    V2G_SEGMENT_SECONDS = 4
+
+    # v2g options that change the output; a GIF source with all of them at their
+    # defaults is sent without re-encoding
+    V2G_ENCODE_OPTIONS = ("fps", "scale", "time", "optimize", "loop", "dither", "colors", "speed", "fit")
+
+    # v2g -fit stops FFmpeg once the GIF reaches this fraction of the litterbox limit
+    V2G_FIT_RATIO = 0.95
+
+    # Worker containers mount the download path here
+    WORKER_MOUNT = "/data"
+
+    # Video extensions accepted for attachments and direct links
+    VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+
+    # Arguments whose first word is one of these are config commands rather than URLs
+    CONFIG_COMMAND_RE = re.compile(
+        r'(?:url|path|debug|persistent|reuse|workers|hostffmpeg|hostgifsicle|lb|limit|jobs|threads|hwaccel|status)(?:\s|$)',
+        re.IGNORECASE
+    )
+
+    # Error text of an upload rejected for its size
+    PAYLOAD_TOO_LARGE = "413 Payload Too Large"
+    # User-facing messages for errors raised by download_from_cobalt
+    COBALT_ERROR_MESSAGES = {
+        "invalid or not supported by Cobalt": "❌ The URL you provided is invalid or not supported by Cobalt. Please check the URL and try again.",
+        "website is not supported by Cobalt": "❌ This website is not supported by Cobalt. Please try a different URL.",
+        "content is private or requires authentication": "❌ This content is private or requires authentication. Cobalt cannot access it.",
+    }
+    # User-facing messages for FFmpeg failures in v2g
+    FFMPEG_ERROR_MESSAGES = {
+        "Option vf (set video filters) cannot be applied to input url": "error processing video. please try again with different parameters.",
+        "Error parsing options for input file": "error reading video file. please check if the file is valid.",
+        "Error opening input files": "error accessing video file. please try again.",
+    }
+    # Each table (plus the size error) as one alternation, so an error is classified in a single search
+    COBALT_ERROR_RE = re.compile("|".join(map(re.escape, [PAYLOAD_TOO_LARGE, *COBALT_ERROR_MESSAGES])))
+    FFMPEG_ERROR_RE = re.compile("|".join(map(re.escape, [PAYLOAD_TOO_LARGE, *FFMPEG_ERROR_MESSAGES])))
+
+    # Default file extension for picker items whose URL has none
+    EXT_BY_TYPE = {"photo": ".jpg", "video": ".mp4", "gif": ".gif", "audio": ".mp3"}
+
+    # Shared HTTP session, created lazily on first use
+    http_session = None
+
+    # Files this run downloaded completely: path -> (source URL, size)
+    downloaded_files = {}
+
+    # Kept v2g palettes, oldest first:
+    # (video path, size, mtime, time range, palette fps, width, colors) -> palette path
+    v2g_palettes = {}
+
+    # Output name suffixes: a counter seeded with the start time in milliseconds,
+    # so names stay unique within a run and don't reuse an earlier run's names
+    output_ids = itertools.count(time.time_ns() // 1_000_000)
+
+    # Running worker containers: tool -> (download path, image, docker args)
+    worker_containers = {}
+    worker_lock = asyncio.Lock()
+
+    # Recent Cobalt answers: (instance, url, quality, audio, mode) -> (expiry, data)
+    cobalt_responses = {}
+
+    # Cobalt instance info for status: instance url -> (expiry, data)
+    cobalt_info = {}
+
+    # Recent v2g URL results, oldest first:
+    # (sorted parsed args, litterbox limit, hwaccel) -> GIF path
+    v2g_results = {}
+
+    # First line of each tool's version output, keyed by the probe's argv
+    tool_versions = {}
+
+    # Fire-and-forget background tasks, referenced until they finish
+    background_tasks = set()
 
-    if getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY) is None:
-        updateConfigData(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8)
-    
     # Helper function for debug logging
     def debug_log(message, type_="INFO"):
         """Log debug messages if debug mode is enabled"""
-        if getConfigData().get(DEBUG_ENABLED_KEY, False):
+        if debug_logging:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             print(f"[{timestamp}] [UNIFIED] [{type_}] {message}", type_=type_)
     
     # Helper function to ensure download directory exists
     def ensure_download_dir(persistent=False, workdir=False):
         """Create and return the appropriate download directory"""
-        download_path = getConfigData().get(DOWNLOAD_PATH_KEY)
+        download_path = base_download_path
         if workdir:
             download_path = os.path.join(download_path, "workdir")
+        # Not memoised: a tmp cleaner may delete the directory while the bot runs
         os.makedirs(download_path, exist_ok=True)
         return download_path
 
-    # Helper function to sanitize filenames
+    # Helper function to stat a file without blocking the event loop
+    async def file_size(path):
+        """Return a file's size in bytes, or None if it does not exist"""
+        try:
+            return (await asyncio.to_thread(os.stat, path)).st_size
+        except FileNotFoundError:
+            return None
+
+    # Helper function to check whether a file is a GIF
+    async def is_gif_file(path):
+        """Return True if the file starts with a GIF signature"""
+        def read_signature():
+            with open(path, "rb") as f:
+                return f.read(6)
+        return await asyncio.to_thread(read_signature) in (b"GIF87a", b"GIF89a")
+
+    # Helper function to delete temporary files off the event loop
+    async def remove_files(*paths):
+        """Delete the given files in one worker thread, skipping missing ones"""
+        def remove_all():
+            # One failure doesn't stop the rest of the batch; the first one is re-raised
+            error = None
+            for path in paths:
+                if path:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        error = error or e
+            if error:
+                raise error
+        await asyncio.to_thread(remove_all)
+
+    # Helper function to start a task nobody waits for
+    def run_in_background(coro):
+        """Schedule coro and keep a reference to it until it finishes"""
+        task = asyncio.create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    # Helper function to delete temporary files after the reply has been sent
+    def cleanup_files(*paths):
+        """Delete temporary files in the background, logging the outcome"""
+        async def cleanup():
+            try:
+                await remove_files(*paths)
+                debug_log("Temporary files deleted", type_="SUCCESS")
+            except Exception as e:
+                debug_log(f"Error deleting temporary files: {str(e)}", type_="ERROR")
+        run_in_background(cleanup())
+
+    # Helper function to send a local file to Discord
+    async def send_file(ctx, path, content=None):
+        """Send a file from an open handle so it is streamed and always closed"""
+        # A 1 MB buffer serves the upload's small reads with far fewer read syscalls
+        fp = await asyncio.to_thread(open, path, "rb", 1 << 20)
+        try:
+            await ctx.send(content, file=discord.File(fp, filename=os.path.basename(path)))
+        finally:
+            await asyncio.to_thread(fp.close)
+
+    # Helper function to name the files made from a video
+    def output_name(video_path):
+        """Return a unique, filter-safe base name for files made from video_path"""
+        stem = os.path.splitext(os.path.basename(video_path))[0]
+        if stem.isascii():
+            stem = stem.translate(GIF_NAME_ASCII_TABLE)
+        else:
+            stem = GIF_NAME_UNSAFE_RE.sub('_', stem)
+        return f"{stem}_{next(output_ids):x}"
+
+    # Helper function to sanitize filenames (memoized; picker items often repeat names)
+    @functools.lru_cache(maxsize=512)
     def sanitize_filename(filename: str) -> str:
         """Return a filesystem-safe filename"""
         # Drop directory components and query strings/fragments
         base = os.path.basename(filename)
-        base = base.split('?')[0].split('#')[0]
-        # Replace characters that are invalid on Windows and other platforms
-        base = re.sub(r'[<>:"/\\|?*]', '_', base)
-        # Replace remaining whitespace with underscores
-        base = re.sub(r'\s+', '_', base)
+        base = base.split('?', 1)[0].split('#', 1)[0]
+        # Replace characters that are invalid on Windows and other platforms,
+        # and whitespace, with underscores
+        base = base.translate(INVALID_FILENAME_CHARS)
+        if not base.isprintable():
+            base = WHITESPACE_RE.sub('_', base)
         return base
     
-    # Helper function to parse Cobalt arguments
-    def parse_cobalt_args(args_str):
-        """Parse Cobalt-specific arguments from command string"""
-        # Normalize spaces to handle both -flag=value and -flag value formats
-        args_str = re.sub(r'-(\w+)=(\w+)', r'-\1 \2', args_str)
-        
-        # Split into words
-        words = args_str.split()
-        
-        # Extract URL (everything before first flag)
-        url_parts = []
+    # Helper function to strip matching outer quotes from a word
+    def unquote_word(word):
+        """Return word without its outer quotes if it is fully wrapped in a matching pair"""
+        if len(word) >= 2 and word[0] == word[-1] and word[0] in "\"'":
+            return word[1:-1]
+        return word
+    
+    # Helper function to split a command string into URL and flags
+    def tokenize_args(args_str):
+        """Return the URL and a dict of flag values parsed in a single pass"""
+        # Split on whitespace only, so apostrophes and backslashes inside a URL
+        # are kept as typed; a word fully wrapped in matching quotes is unquoted
+        words = [unquote_word(word) for word in args_str.split()]
+        
+        # Extract URL (everything before first flag); quotes around a URL with
+        # spaces are dropped once the words are joined back together
         i = 0
         while i < len(words) and not words[i].startswith('-'):
-            url_parts.append(words[i])
             i += 1
-        url = ' '.join(url_parts)
-        
-        # Default values
-        quality = "1080"
-        audio = "mp3"
-        mode = "auto"
-        
-        # Track provided flags
-        quality_provided = False
-        audio_provided = False
-        mode_provided = False
+        url = unquote_word(' '.join(words[:i]))
         
+        flags = {}
         while i < len(words):
+            word = words[i]
+            i += 1
+            if not word.startswith('-'):
+                continue
+            # Single-word Cobalt flags (-max, -wav, -audio, ...)
+            if word in COBALT_FLAGS:
+                key, value = COBALT_FLAGS[word]
+                flags[key] = value
+                continue
+            # Legacy two-word format (-quality 720, -mode audio)
+            if word in COBALT_LEGACY_FLAGS:
+                if i < len(words):
+                    flags[COBALT_LEGACY_FLAGS[word]] = words[i]
+                    i += 1
+                continue
             # Quality flags (-720p, etc.)
-            quality_match = re.match(r'-(\d+)p$', words[i])
+            quality_match = QUALITY_FLAG_RE.match(word)
             if quality_match:
-                quality = quality_match.group(1)
-                quality_provided = True
-                i += 1
-            # Max quality
-            elif words[i] == '-max':
-                quality = "max"
-                quality_provided = True
-                i += 1
-            # Audio format
-            elif words[i] in ['-wav', '-ogg', '-opus', '-best']:
-                audio = words[i][1:]
-                audio_provided = True
-                i += 1
-            # Mode flags
-            elif words[i] in ['-audio', '-mute']:
-                mode = words[i][1:]
-                mode_provided = True
-                i += 1
-            # Legacy format support
-            elif words[i] == '-quality' and i + 1 < len(words):
-                quality = words[i+1]
-                quality_provided = True
-                i += 2
-            elif words[i] == '-audio' and i + 1 < len(words):
-                audio = words[i+1]
-                audio_provided = True
-                i += 2
-            elif words[i] == '-mode' and i + 1 < len(words):
-                mode = words[i+1]
-                mode_provided = True
-                i += 2
-            else:
-                i += 1
+                flags["quality"] = quality_match.group(1)
+                continue
+            # -flag=value or bare -flag
+            name, sep, value = word[1:].partition('=')
+            if not sep:
+                flags[name] = True
+            elif value:
+                flags[name] = value
+        
+        return url, flags
+    
+    # Helper function to read a validated flag value
+    def flag_value(flags, name, default, convert=str):
+        """Return the flag's value if it matches its expected format, else the default"""
+        value = flags.get(name)
+        if isinstance(value, str):
+            match = FLAG_VALUE_PATTERNS[name].match(value)
+            if match:
+                return convert(match.group(0))
+        return default
+    
+    # Helper function to convert a -time value to numbers
+    def parse_time_range(value):
+        """Return (start, end) in seconds for a start-end range"""
+        start_time, end_time = value.split("-")
+        return float(start_time), float(end_time)
+    
+    # Helper function to parse Cobalt arguments
+    def parse_cobalt_args(args_str, tokens=None):
+        """Parse Cobalt-specific arguments from command string"""
+        url, flags = tokens or tokenize_args(args_str)
         
         return {
-            "url": url.strip(),
-            "quality": quality,
-            "audio": audio,
-            "mode": mode,
-            "quality_provided": quality_provided,
-            "audio_provided": audio_provided,
-            "mode_provided": mode_provided
+            "url": url,
+            "quality": flags.get("quality", "1080"),
+            "audio": flags.get("audio", "mp3"),
+            "mode": flags.get("mode", "auto"),
+            "quality_provided": "quality" in flags,
+            "audio_provided": "audio" in flags,
+            "mode_provided": "mode" in flags
         }
     
     # Helper function to parse GIF arguments
     def parse_gif_args(args_str):
         """Parse GIF-specific arguments from command string"""
-        # First get Cobalt args
-        cobalt_args = parse_cobalt_args(args_str)
-        
-        # Then parse GIF-specific args
-        fps_match = re.search(r'-fps=(\d+)', args_str)
-        scale_match = re.search(r'-scale=(\d+:-1)', args_str)
-        time_match = re.search(r'-time=(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)', args_str)
-        optimize_match = re.search(r'-optimize', args_str)
-        speed_match = re.search(r'-speed=(\d*\.?\d+)', args_str)  # Add speed parameter
-        
-        # Get URL and remove GIF flags
-        url = cobalt_args["url"]
-        for match in [fps_match, scale_match, time_match, optimize_match, speed_match]:
-            if match and match.group(0) in url:
-                url = url.replace(match.group(0), "").strip()
-        
-        return {
-            "url": url.strip(),
-            "quality": cobalt_args["quality"],
-            "audio": cobalt_args["audio"],
-            "mode": cobalt_args["mode"],
-            "quality_provided": cobalt_args["quality_provided"],
-            "audio_provided": cobalt_args["audio_provided"],
-            "mode_provided": cobalt_args["mode_provided"],
-            "fps": int(fps_match.group(1)) if fps_match else 15,
-            "scale": scale_match.group(1) if scale_match else "480:-1",
-            "time": time_match.group(1) + "-" + time_match.group(2) if time_match else None,
-            "optimize": bool(optimize_match),
-            "speed": float(speed_match.group(1)) if speed_match else 1.0  # Add speed to return dict
-        }
+        tokens = tokenize_args(args_str)
+        flags = tokens[1]
+        
+        parsed = parse_cobalt_args(args_str, tokens)
+        parsed.update({
+            "fps": flag_value(flags, "fps", 15, int),
+            "scale": flag_value(flags, "scale", "480:-1"),
+            "time": flag_value(flags, "time", None, parse_time_range),
+            "optimize": flags.get("optimize") is True,
+            "speed": flag_value(flags, "speed", 1.0, float)
+        })
+        return parsed
     
     # Helper function to parse v2g arguments
     def parse_v2g_args(args_str):
         """Parse v2g-specific arguments from command string"""
-        # First get Cobalt args
-        cobalt_args = parse_cobalt_args(args_str)
-        
-        # Then parse v2g-specific args
-        fps_match = re.search(r'-fps=(\d+)', args_str)
-        scale_match = re.search(r'-scale=(\d+:-1)', args_str)
-        time_match = re.search(r'-time=(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)', args_str)
-        optimize_match = re.search(r'-optimize', args_str)
-        quality_match = re.search(r'-(\d+)p', args_str)
-        loop_match = re.search(r'-loop=(\d+)', args_str)
-        dither_match = re.search(r'-dither=(\w+)', args_str)
-        colors_match = re.search(r'-colors=(\d+)', args_str)
-        speed_match = re.search(r'-speed=(\d*\.?\d+)', args_str)  # Add speed parameter
-        
-        # Get URL and remove v2g flags
-        url = cobalt_args["url"]
-        for match in [fps_match, scale_match, time_match, optimize_match, quality_match, loop_match, dither_match, colors_match, speed_match]:
-            if match and match.group(0) in url:
-                url = url.replace(match.group(0), "").strip()
+        tokens = tokenize_args(args_str)
+        flags = tokens[1]
+        cobalt_args = parse_cobalt_args(args_str, tokens)
         
         return {
-            "url": url.strip(),
-            "fps": int(fps_match.group(1)) if fps_match else 15,
-            "scale": scale_match.group(1) if scale_match else "480:-1",
-            "time": time_match.group(1) + "-" + time_match.group(2) if time_match else None,
-            "optimize": bool(optimize_match),
-            "quality": quality_match.group(1) if quality_match else "1080",
-            "loop": int(loop_match.group(1)) if loop_match else 0,
-            "dither": dither_match.group(1) if dither_match else "bayer:bayer_scale=5",
-            "colors": int(colors_match.group(1)) if colors_match else 256,
-            "speed": float(speed_match.group(1)) if speed_match else 1.0  # Add speed to return dict
+            "url": cobalt_args["url"],
+            "fps": flag_value(flags, "fps", 15, int),
+            "scale": flag_value(flags, "scale", "480:-1"),
+            "time": flag_value(flags, "time", None, parse_time_range),
+            "optimize": flags.get("optimize") is True,
+            "quality": cobalt_args["quality"],
+            "loop": flag_value(flags, "loop", 0, int),
+            "dither": flag_value(flags, "dither", "bayer:bayer_scale=5"),
+            "colors": flag_value(flags, "colors", 256, int),
+            "speed": flag_value(flags, "speed", 1.0, float),
+            "fit": flags.get("fit") is True
         }
 
     # Helper function to parse v2mp3 arguments
     def parse_v2mp3_args(args_str):
         """Parse arguments for the v2mp3 command"""
-        cobalt_args = parse_cobalt_args(args_str)
-
-        time_match = re.search(r'-time=(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)', args_str)
-
-        url = cobalt_args["url"]
-        if time_match and time_match.group(0) in url:
-            url = url.replace(time_match.group(0), "").strip()
+        tokens = tokenize_args(args_str)
+        cobalt_args = parse_cobalt_args(args_str, tokens)
 
         return {
-            "url": url.strip(),
+            "url": cobalt_args["url"],
             "quality": cobalt_args["quality"],
-            "time": time_match.group(1) + "-" + time_match.group(2) if time_match else None,
+            "time": flag_value(tokens[1], "time", None, parse_time_range),
         }
     
+    # Helper function to turn a -time range into FFmpeg seek arguments
+    def time_range_args(time_range):
+        """Return (FFmpeg -ss/-t args, clip length in seconds) for a (start, end) range"""
+        if not time_range:
+            return [], None
+        start_time, end_time = time_range
+        clip_seconds = end_time - start_time
+        if clip_seconds <= 0:
+            raise Exception("Invalid time range: the end must be after the start")
+        return ["-ss", str(start_time), "-t", str(clip_seconds)], clip_seconds
+    
+    # Helper function to turn a failed command's stderr into an exception
+    def command_error(stderr):
+        """Drop workers the error shows are gone and return the failure exception"""
+        error_text = stderr.decode()
+        forget_dead_workers(error_text)
+        return Exception(f"Docker command failed: {error_text}")
+    
     # Helper function to run docker commands
-    async def run_docker_cmd(cmd):
-        """Execute a Docker command and return its output"""
-        debug_log(f"Running docker command: {cmd}", type_="INFO")
-        process = await asyncio.create_subprocess_shell(
-            cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
+    async def run_docker_cmd(argv):
+        """Execute a Docker command given as an argv list and return its output"""
+        # Only quote the argv for the log when it will actually be printed
+        if debug_logging:
+            debug_log(f"Running docker command: {shlex.join(argv)}", type_="INFO")
+        if docker_semaphore.locked():
+            debug_log("Waiting for a free docker slot", type_="INFO")
+        async with docker_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
         if process.returncode != 0:
-            raise Exception(f"Docker command failed: {stderr.decode()}")
+            raise command_error(stderr)
         return stdout.decode()
     
+    # Helper function to pipe one docker command into another
+    async def run_docker_pipeline(producer_argv, consumer_argv):
+        """Run producer_argv with its stdout piped into consumer_argv's stdin"""
+        if debug_logging:
+            debug_log(f"Running docker pipeline: {shlex.join(producer_argv)} | {shlex.join(consumer_argv)}", type_="INFO")
+        if docker_semaphore.locked():
+            debug_log("Waiting for a free docker slot", type_="INFO")
+        # The two stages stream into each other, so they share one slot
+        async with docker_semaphore:
+            read_fd, write_fd = os.pipe()
+            # Both pipe ends are closed here once the children have them, and
+            # also when either process fails to start
+            producer = None
+            try:
+                producer = await asyncio.create_subprocess_exec(
+                    *producer_argv,
+                    stdout=write_fd,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                os.close(write_fd)
+                write_fd = None
+                consumer = await asyncio.create_subprocess_exec(
+                    *consumer_argv,
+                    stdin=read_fd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except Exception:
+                if producer is not None:
+                    producer.kill()
+                    await producer.wait()
+                raise
+            finally:
+                if write_fd is not None:
+                    os.close(write_fd)
+                os.close(read_fd)
+            (_, producer_err), (stdout, consumer_err) = await asyncio.gather(
+                producer.communicate(),
+                consumer.communicate()
+            )
+        if producer.returncode != 0:
+            raise command_error(producer_err)
+        if consumer.returncode != 0:
+            raise command_error(consumer_err)
+        return stdout.decode()
+    
+    # Helper function to get the FFmpeg docker settings for the hwaccel mode
+    def ffmpeg_docker_settings():
+        """Return (docker run args, image, ffmpeg input args) for the configured hwaccel"""
+        docker_args, image = FFMPEG_HWACCEL_DOCKER.get(ffmpeg_hwaccel, FFMPEG_HWACCEL_DOCKER["auto"])
+        input_args = [] if ffmpeg_hwaccel == "none" else ["-hwaccel", ffmpeg_hwaccel]
+        return docker_args, image, input_args
+    
+    # Helper function to pick a hwaccel mode for the host's GPU
+    def detect_hwaccel():
+        """Return cuda for an NVIDIA driver, vaapi for a DRI render node, else none"""
+        if shutil.which("nvidia-smi"):
+            return "cuda"
+        if os.path.exists("/dev/dri/renderD128"):
+            return "vaapi"
+        return "none"
+    
+    # Helper function to drop cached workers after docker reports them gone
+    def forget_dead_workers(error_text):
+        """Clear the worker cache if a docker exec failed because its container is gone"""
+        if worker_containers and ("No such container" in error_text or "is not running" in error_text):
+            debug_log("Worker container is gone, it will be recreated on the next run", type_="ERROR")
+            worker_containers.clear()
+    
+    # Helper function to start a long-lived tool container
+    async def ensure_worker_container(tool, image, docker_args):
+        """Start (or reuse) the worker container for tool and return its name"""
+        name = f"localcobalt-{tool}"
+        # docker -v only accepts absolute host paths
+        download_path = os.path.abspath(ensure_download_dir())
+        signature = (download_path, image, tuple(docker_args))
+        async with worker_lock:
+            if worker_containers.get(tool) == signature:
+                return name
+            # Replace any container left over from an earlier run or older settings
+            try:
+                await run_docker_cmd(["docker", "rm", "-f", name])
+            except Exception:
+                pass
+            await run_docker_cmd([
+                "docker", "run", "-d", "--name", name, *docker_args,
+                "-v", f"{download_path}:{WORKER_MOUNT}",
+                "--entrypoint", "tail", image, "-f", "/dev/null"
+            ])
+            worker_containers[tool] = signature
+            debug_log(f"Started worker container {name} ({image})", type_="SUCCESS")
+        return name
+    
+    # Helper function to map a path inside a per-run mount to the worker mount
+    def worker_path(arg, mounts, download_path):
+        """Rewrite an argument that points into one of the mounts to its worker container path"""
+        for alias, host_dir in mounts.items():
+            if arg == alias or arg.startswith(alias + "/"):
+                rel = os.path.relpath(host_dir, download_path).replace(os.sep, "/")
+                base = WORKER_MOUNT if rel == "." else f"{WORKER_MOUNT}/{rel}"
+                return base + arg[len(alias):]
+        return arg
+    
+    # Helper function to map a path inside a per-run mount back to the host
+    def host_path(arg, mounts):
+        """Rewrite an argument that points into one of the mounts to its host path"""
+        for alias, host_dir in mounts.items():
+            if arg == alias or arg.startswith(alias + "/"):
+                return os.path.join(host_dir, *arg[len(alias):].split("/"))
+        return arg
+    
+    # Helper function to map a path inside one mount alias to another alias
+    def alias_path(arg, aliases):
+        """Rewrite an argument that points into one of the aliases to the alias it maps to"""
+        for alias, target in aliases.items():
+            if arg == alias or arg.startswith(alias + "/"):
+                return target + arg[len(alias):]
+        return arg
+    
+    # Helper function to build the docker argv for an ffmpeg or gifsicle run
+    async def tool_argv(tool, mounts, args, interactive=False, readonly=()):
+        """Return the docker argv running tool with args.
+        
+        mounts maps container directories used in args to host directories; those
+        listed in readonly are mounted read-only. Aliases for the same host
+        directory share one mount. With worker containers enabled
+        the command is run with docker exec and the paths are rewritten to the
+        shared download path mount. Tools enabled in host_tools are run directly
+        with the host paths.
+        """
+        if tool in host_tools:
+            return [tool, *(host_path(arg, mounts) for arg in args)]
+        if tool == "ffmpeg":
+            docker_args, image, _ = ffmpeg_docker_settings()
+        else:
+            docker_args, image = [], GIFSICLE_IMAGE
+        stdin_args = ["-i"] if interactive else []
+        if not use_workers:
+            # Bind each host directory once; aliases sharing a directory are rewritten
+            # to the first one, which is read-only only if all of them are. Docker only
+            # accepts absolute host paths, so relative download paths are resolved here
+            shared = {}
+            for alias, host_dir in mounts.items():
+                shared.setdefault(os.path.normcase(os.path.abspath(host_dir)), []).append(alias)
+            volume_args, renamed = [], {}
+            for aliases in shared.values():
+                target = aliases[0]
+                mode = ":ro" if all(alias in readonly for alias in aliases) else ""
+                volume_args.extend(["-v", f"{os.path.abspath(mounts[target])}:{target}{mode}"])
+                renamed.update((alias, target) for alias in aliases[1:])
+            if renamed:
+                args = [alias_path(arg, renamed) for arg in args]
+            command = [] if tool == "ffmpeg" else [tool]
+            return ["docker", "run", "--rm", *stdin_args, *docker_args, *volume_args, image, *command, *args]
+        name = await ensure_worker_container(tool, image, docker_args)
+        download_path = ensure_download_dir()
+        return [
+            "docker", "exec", *stdin_args, name, tool,
+            *(worker_path(arg, mounts, download_path) for arg in args)
+        ]
+    
+    # Helper function to start the worker containers while a download runs
+    def warm_workers(tools=("ffmpeg", "gifsicle")):
+        """Start the worker containers for tools in the background"""
+        if not use_workers:
+            return
+        async def warm(tool):
+            try:
+                await tool_argv(tool, {}, [])
+            except Exception as e:
+                debug_log(f"Could not pre-start {tool} worker: {str(e)}", type_="ERROR")
+        for tool in tools:
+            if tool not in host_tools:
+                run_in_background(warm(tool))
+    
+    # Helper function to point out host binaries that could replace docker
+    def host_hint(tool):
+        """Return a status suffix when tool is installed on the host but not in use"""
+        if tool not in host_tools and shutil.which(tool):
+            return f" (found on PATH, `host{tool}` skips docker)"
+        return ""
+    
+    # Helper function to get a Cobalt instance's info
+    async def get_cobalt_info(cobalt_url):
+        """Return (HTTP status, info JSON) for the instance, reusing recent info while it is up"""
+        session = await get_session()
+        timeout = aiohttp.ClientTimeout(total=5)
+        cached = cobalt_info.get(cobalt_url)
+        if cached and cached[0] > time.monotonic():
+            # A HEAD request is enough to tell the instance is still up; any
+            # other answer falls through to a full request for the real status
+            async with session.head(cobalt_url, timeout=timeout) as response:
+                if response.status == 200:
+                    return 200, cached[1]
+        cobalt_info.pop(cobalt_url, None)
+        async with session.get(cobalt_url, timeout=timeout) as response:
+            if response.status != 200:
+                return response.status, None
+            data = await response.json()
+        cobalt_info[cobalt_url] = (time.monotonic() + COBALT_INFO_TTL, data)
+        return 200, data
+    
+    # Helper function to get a tool's version line
+    async def get_tool_version(tool, version_arg):
+        """Return the first line of a tool's version output, cached per command"""
+        # Probe the host binary or image the conversions actually use
+        argv = await tool_argv(tool, {}, [version_arg])
+        key = tuple(argv)
+        if key not in tool_versions:
+            output = await run_docker_cmd(argv)
+            tool_versions[key] = output.split('\n')[0]
+        return tool_versions[key]
+    
+    # Helper function to describe a tool for status
+    async def tool_status(tool, label, version_arg):
+        """Return the status lines for tool, reporting a failed probe instead of raising"""
+        source = "Host" if tool in host_tools else "Docker"
+        try:
+            version = await get_tool_version(tool, version_arg)
+        except Exception as e:
+            debug_log(f"{tool} version check failed: {str(e)}", type_="ERROR")
+            reason = str(e).strip().split('\n')[0] or type(e).__name__
+            return f"**{label} {source} {TOOL_NAMES[tool]}**: ❌ Not working\n```{reason}```\n"
+        if tool == "ffmpeg":
+            version = FFMPEG_VERSION_RE.sub(r'ffmpeg version \1', version)
+        return f"**{label} {source} {TOOL_NAMES[tool]}**: ✅ Working\n```{version}```\n"
+    
+    # Remove worker containers when the interpreter exits
+    def stop_worker_containers():
+        """Force-remove any worker containers started by this script"""
+        for tool in list(worker_containers):
+            try:
+                subprocess.run(
+                    ["docker", "rm", "-f", f"localcobalt-{tool}"],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15
+                )
+            except Exception:
+                pass
+        worker_containers.clear()
+
+    atexit.register(stop_worker_containers)
+
+    # Helper function to get the shared HTTP session
+    async def get_session():
+        """Return the shared aiohttp session, creating it on first use"""
+        nonlocal http_session
+        if http_session is None or http_session.closed:
+            # Keep idle connections around between commands so the next CDN or
+            # litterbox request can reuse them instead of redoing the TLS handshake
+            connector_args = {"limit": 32, "limit_per_host": 8, "ttl_dns_cache": 300, "keepalive_timeout": 60}
+            if aiodns is not None:
+                try:
+                    connector_args["resolver"] = aiohttp.AsyncResolver()
+                except Exception as e:
+                    # aiodns can't run on some event loops (e.g. the Windows proactor loop)
+                    debug_log(f"Async DNS resolver unavailable: {str(e)}", type_="INFO")
+            try:
+                # Start the IPv4 attempt sooner when IPv6 is slow (aiohttp 3.10+)
+                connector = aiohttp.TCPConnector(**connector_args, happy_eyeballs_delay=0.1, interleave=1)
+            except TypeError:
+                connector = aiohttp.TCPConnector(**connector_args)
+            http_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=60)
+            )
+            debug_log("Created shared HTTP session", type_="INFO")
+        return http_session
+
+    # Close the shared HTTP session when the interpreter exits
+    def close_session():
+        """Close the shared aiohttp session if it is still open"""
+        if http_session is None or http_session.closed:
+            return
+        try:
+            loop = asyncio.get_event_loop()
+            if loop.is_running():
+                loop.create_task(http_session.close())
+            elif not loop.is_closed():
+                loop.run_until_complete(http_session.close())
+        except Exception:
+            pass
+
+    atexit.register(close_session)
+
+    # Raised by download_file for an unsuccessful response, so callers can check
+    # the status instead of matching the message
+    class DownloadHTTPError(Exception):
+        """Download failure carrying the HTTP status code"""
+        def __init__(self, status):
+            self.status = status
+            super().__init__(f"Failed to download file: HTTP {status}")
+
+    # Helper function to get a URL's size without downloading it
+    async def remote_size(url, headers):
+        """Return the Content-Length a HEAD request reports, or None"""
+        session = await get_session()
+        try:
+            async with session.head(url, headers=headers, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    return response.content_length
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            debug_log(f"HEAD request failed: {str(e)}", type_="INFO")
+        return None
+
     # Helper function to download files
-    async def download_file(url, filename, referer=None):
-        """Download a file from URL to the download directory"""
+    async def download_file(url, filename, referer=None, resume=False):
+        """Download a file from URL to the download directory.
+        
+        With resume=True an existing partial file is continued with a Range request.
+        """
         filename = sanitize_filename(filename)
         download_path = ensure_download_dir()
         file_path = os.path.join(download_path, filename)
         debug_log(f"Downloading to: {file_path}", type_="INFO")
 
-        base_headers = {
+        headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Accept": "*/*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Range": "bytes=0-"
+            "Accept-Language": "en-US,en;q=0.9"
         }
         if referer:
-            base_headers["Referer"] = referer
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                debug_log(f"Attempting download from URL: {url}", type_="INFO")
-                headers = base_headers.copy()
-
-                for attempt in range(2):
-                    debug_log(f"Using headers: {headers}", type_="INFO")
-                    async with session.get(url, headers=headers, timeout=60) as response:
-                        debug_log(f"Response status: {response.status}", type_="INFO")
-                        debug_log(f"Response headers: {dict(response.headers)}", type_="INFO")
-
-                        if response.status in [200, 206]:
-                            debug_log(f"Download connection established (HTTP {response.status})", type_="SUCCESS")
-                            total_size = 0
-                            with open(file_path, 'wb') as f:
-                                while True:
-                                    chunk = await response.content.read(8192)
-                                    if not chunk:
-                                        break
-                                    f.write(chunk)
-                                    total_size += len(chunk)
-                                    if total_size % (1024 * 1024) == 0:
-                                        debug_log(f"Downloaded: {total_size / 1024 / 1024:.2f} MB", type_="INFO")
-
-                            if total_size == 0:
-                                raise Exception("Downloaded file is 0 bytes")
-
-                            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-                                raise Exception("File was not properly saved")
-
-                            debug_log(f"Download completed. Size: {total_size / 1024 / 1024:.2f} MB", type_="SUCCESS")
-                            await asyncio.sleep(1)
-
-                            return file_path
-                        elif response.status == 403 and attempt == 0 and "Range" in headers:
-                            debug_log("HTTP 403 received, retrying without Range header", type_="WARNING")
-                            headers.pop("Range", None)
-                            continue
-                        else:
-                            error_msg = f"Failed to download file: HTTP {response.status}"
-                            debug_log(error_msg, type_="ERROR")
-                            debug_log(f"Response headers: {dict(response.headers)}", type_="ERROR")
-                            debug_log(f"Response content: {await response.text()}", type_="ERROR")
-                            raise Exception(error_msg)
-            except aiohttp.ClientError as e:
-                error_msg = f"Network error: {str(e)}"
-                debug_log(error_msg, type_="ERROR")
-                debug_log(f"URL: {url}", type_="ERROR")
-                debug_log(f"Headers: {headers}", type_="ERROR")
-                if hasattr(e, 'status'):
-                    debug_log(f"Error status: {e.status}", type_="ERROR")
-                if hasattr(e, 'headers'):
-                    debug_log(f"Error headers: {dict(e.headers)}", type_="ERROR")
-                raise Exception(error_msg)
-            except Exception as e:
-                error_msg = f"Unexpected error during download: {str(e)}"
-                debug_log(error_msg, type_="ERROR")
-                debug_log(f"URL: {url}", type_="ERROR")
-                debug_log(f"Headers: {headers}", type_="ERROR")
-                raise
+            headers["Referer"] = referer
+
+        # Only send Range when resuming; many CDNs answer 403 to it
+        offset = 0
+        if resume:
+            offset = await file_size(file_path) or 0
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+        # With persistent storage a file this run downloaded from the same URL is
+        # reused when it is unchanged and a HEAD request reports the same size;
+        # names like input_video.mp4 are shared by many URLs, so the name alone
+        # proves nothing. Cobalt tunnels stream the file on demand and have no
+        # size to compare, so they skip the check
+        elif keep_files and reuse_existing and not is_tunnel_url(url):
+            existing_size = await file_size(file_path)
+            if (existing_size and downloaded_files.get(file_path) == (url, existing_size)
+                    and await remote_size(url, headers) == existing_size):
+                debug_log(f"Already downloaded ({existing_size} bytes), skipping", type_="SUCCESS")
+                return file_path
+        
+        session = await get_session()
+        try:
+            debug_log(f"Attempting download from URL: {url}", type_="INFO")
+            if debug_logging:
+                debug_log(f"Using headers: {headers}", type_="INFO")
+            async with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+                debug_log(f"Response status: {response.status}", type_="INFO")
+                if debug_logging:
+                    debug_log(f"Response headers: {dict(response.headers)}", type_="INFO")
+
+                if response.status in [200, 206]:
+                    debug_log(f"Download connection established (HTTP {response.status})", type_="SUCCESS")
+                    # Append only when the server honoured the Range request
+                    appending = response.status == 206 and offset > 0
+                    total_size = offset if appending else 0
+                    # Progress is only timed when it will be logged
+                    log_progress = debug_logging
+                    next_log = time.monotonic() + 1.0
+                    # Open, write and close in a worker thread so disk I/O doesn't stall the event loop
+                    downloaded_files.pop(file_path, None)
+                    f = await asyncio.to_thread(open, file_path, 'ab' if appending else 'wb')
+                    # Reserve the whole file up front where the OS supports it (not Windows),
+                    # so the filesystem doesn't extend it chunk by chunk
+                    preallocated = False
+                    if not appending and response.content_length and hasattr(os, "posix_fallocate"):
+                        try:
+                            await asyncio.to_thread(os.posix_fallocate, f.fileno(), 0, response.content_length)
+                            preallocated = True
+                        except OSError:
+                            pass
+                    # Each chunk is written while the next one is received; keeping a
+                    # single write in flight preserves their order
+                    pending_write = None
+                    try:
+                        async for chunk in response.content.iter_chunked(1024 * 1024):
+                            if pending_write is not None:
+                                await pending_write
+                            pending_write = asyncio.ensure_future(asyncio.to_thread(f.write, chunk))
+                            total_size += len(chunk)
+                            if log_progress:
+                                now = time.monotonic()
+                                if now >= next_log:
+                                    debug_log(f"Downloaded: {total_size / BYTES_PER_MB:.2f} MB", type_="INFO")
+                                    next_log = now + 1.0
+                        if pending_write is not None:
+                            await pending_write
+                    finally:
+                        # Let an interrupted write finish before the file is truncated and closed
+                        if pending_write is not None:
+                            await asyncio.gather(pending_write, return_exceptions=True)
+                        # Cut the reserved space back to what was written, so an
+                        # interrupted download doesn't look complete
+                        if preallocated:
+                            await asyncio.to_thread(f.truncate)
+                        await asyncio.to_thread(f.close)
+
+                    # The byte count is what was written, so the file doesn't need to be statted again
+                    if total_size == 0:
+                        raise Exception("Downloaded file is 0 bytes")
+
+                    debug_log(f"Download completed. Size: {total_size / BYTES_PER_MB:.2f} MB", type_="SUCCESS")
+                    downloaded_files[file_path] = (url, total_size)
+                    return file_path
+                elif response.status == 416 and offset > 0:
+                    debug_log("Range not satisfiable, file is already complete", type_="INFO")
+                    return file_path
+                else:
+                    error = DownloadHTTPError(response.status)
+                    debug_log(str(error), type_="ERROR")
+                    # Only read the error body when it will actually be logged
+                    if debug_logging:
+                        debug_log(f"Response headers: {dict(response.headers)}", type_="ERROR")
+                        debug_log(f"Response content: {await response.text()}", type_="ERROR")
+                    raise error
+        except aiohttp.ClientError as e:
+            error_msg = f"Network error: {str(e)}"
+            debug_log(error_msg, type_="ERROR")
+            debug_log(f"URL: {url}", type_="ERROR")
+            debug_log(f"Headers: {headers}", type_="ERROR")
+            if hasattr(e, 'status'):
+                debug_log(f"Error status: {e.status}", type_="ERROR")
+            if debug_logging and getattr(e, 'headers', None) is not None:
+                debug_log(f"Error headers: {dict(e.headers)}", type_="ERROR")
+            raise Exception(error_msg)
+        except Exception as e:
+            error_msg = f"Unexpected error during download: {str(e)}"
+            debug_log(error_msg, type_="ERROR")
+            debug_log(f"URL: {url}", type_="ERROR")
+            debug_log(f"Headers: {headers}", type_="ERROR")
+            raise
+    
+    # Helper function to recognise Cobalt tunnel URLs
+    def is_tunnel_url(url):
+        """Return True if url is served by the Cobalt instance or is a /tunnel link"""
+        return url.startswith(cobalt_base_url.rstrip("/") + "/") or urlsplit(url).path.rstrip("/").endswith("/tunnel")
     
     # Helper function to validate URLs
     def is_valid_url(url):
@@ -469,20 +1196,29 @@ def unified_cobalt_script():
         if not url:
             return False
         
-        # Check if URL has a valid scheme
-        if not url.startswith(('http://', 'https://')):
+        # Check scheme and host without regex backtracking
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return False
+        # hostname (unlike netloc) is empty for authority-only junk like "http://user@"
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
             return False
         
-        # Basic URL format validation
-        url_pattern = re.compile(
-            r'^https?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
-            r'localhost|'  # localhost
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-        
-        return bool(url_pattern.match(url))
+        # URLs must be a single token
+        return not any(ch.isspace() for ch in url)
+    
+    # Helper function to explain a failed media download
+    def download_error(error, url):
+        """Return a user-friendly exception for 403/429 download failures, else error itself"""
+        status = error.status if isinstance(error, DownloadHTTPError) else None
+        if status == 403:
+            if "instagram.com" in url.lower():
+                return Exception("Instagram is blocking the download. Try:\n• Making sure the content is public\n• Waiting a few minutes\n• Using a different Cobalt instance")
+            return Exception("Access denied (403) when downloading. The server is blocking the request. Try again later or use a different Cobalt instance.")
+        if status == 429:
+            return Exception("Too many requests. Please wait a few minutes before trying again.")
+        return error
     
     # Helper function to download from Cobalt
     async def download_from_cobalt(url, quality, audio, mode):
@@ -495,7 +1231,6 @@ def unified_cobalt_script():
             debug_log(f"Invalid URL format: {url}", type_="ERROR")
             raise Exception("The URL you provided is invalid. Please check the URL format and try again.")
         
-        cobalt_base_url = getConfigData().get(COBALT_URL_KEY, "http://localhost:9000")
         headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -511,191 +1246,204 @@ def unified_cobalt_script():
         }
         
         debug_log(f"Sending request to Cobalt API: {cobalt_base_url}", type_="INFO")
-        debug_log(f"Request payload: {payload}", type_="INFO")
+        if debug_logging:
+            debug_log(f"Request payload: {payload}", type_="INFO")
+        
+        # A repeated request within COBALT_RESPONSE_TTL reuses Cobalt's answer
+        cache_key = (cobalt_base_url, url, quality, audio, mode)
+        cached = cobalt_responses.get(cache_key)
         
         try:
-            async with aiohttp.ClientSession() as session:
+            if cached and cached[0] > time.monotonic():
+                debug_log("Using cached Cobalt response", type_="INFO")
+                status, data = 200, cached[1]
+            else:
+                session = await get_session()
                 async with session.post(
                     cobalt_base_url, 
                     headers=headers, 
-                    json=payload,
-                    timeout=30
+                    data=json_dumps(payload),
+                    timeout=aiohttp.ClientTimeout(total=30)
                 ) as response:
-                    debug_log(f"Cobalt API response status: {response.status}", type_="INFO")
+                    status = response.status
+                    debug_log(f"Cobalt API response status: {status}", type_="INFO")
                     
-                    try:
-                        response_text = await response.text()
-                        debug_log(f"Raw response: {response_text}", type_="INFO")
-                        data = json.loads(response_text) if response_text else {}
-                    except json.JSONDecodeError as e:
-                        debug_log(f"Failed to parse JSON response: {str(e)}", type_="ERROR")
-                        debug_log(f"Raw response text: {response_text}", type_="ERROR")
-                        raise Exception(f"Invalid response from Cobalt API: {str(e)}")
+                    # Parse straight from bytes; orjson's JSONDecodeError subclasses json's
+                    raw_response = await response.read()
+                try:
+                    if debug_logging:
+                        debug_log(f"Raw response: {raw_response.decode('utf-8', errors='replace')}", type_="INFO")
+                    data = json_loads(raw_response) if raw_response else {}
+                except json.JSONDecodeError as e:
+                    debug_log(f"Failed to parse JSON response: {str(e)}", type_="ERROR")
+                    if debug_logging:
+                        debug_log(f"Raw response text: {raw_response.decode('utf-8', errors='replace')}", type_="ERROR")
+                    raise Exception(f"Invalid response from Cobalt API: {str(e)}")
+                if status == 200 and data.get("status") in ("tunnel", "redirect", "picker"):
+                    now = time.monotonic()
+                    for key in [key for key, (expires, _) in cobalt_responses.items() if expires <= now]:
+                        del cobalt_responses[key]
+                    cobalt_responses[cache_key] = (now + COBALT_RESPONSE_TTL, data)
+            
+            if status == 200:
+                if data.get("status") == "error":
+                    error_code = data.get("error", {}).get("code", "unknown")
+                    error_message = data.get("error", {}).get("message", "No error message provided")
+                    debug_log(f"Cobalt API error - Code: {error_code}, Message: {error_message}", type_="ERROR")
+                        
+                    # Provide more user-friendly error messages for specific error codes
+                    if error_code == "error.api.link.invalid":
+                        raise Exception("The URL you provided is invalid or not supported by Cobalt. Please check the URL and try again.")
+                    elif error_code == "error.api.link.unsupported":
+                        raise Exception("This website is not supported by Cobalt. Please try a different URL.")
+                    elif error_code == "error.api.link.private":
+                        raise Exception("This content is private or requires authentication. Cobalt cannot access it.")
+                    else:
+                        raise Exception(f"Cobalt API error: {error_code} - {error_message}")
                     
-                    if response.status == 200:
-                        if data.get("status") == "error":
-                            error_code = data.get("error", {}).get("code", "unknown")
-                            error_message = data.get("error", {}).get("message", "No error message provided")
-                            debug_log(f"Cobalt API error - Code: {error_code}, Message: {error_message}", type_="ERROR")
-                            
-                            # Provide more user-friendly error messages for specific error codes
-                            if error_code == "error.api.link.invalid":
-                                raise Exception("The URL you provided is invalid or not supported by Cobalt. Please check the URL and try again.")
-                            elif error_code == "error.api.link.unsupported":
-                                raise Exception("This website is not supported by Cobalt. Please try a different URL.")
-                            elif error_code == "error.api.link.private":
-                                raise Exception("This content is private or requires authentication. Cobalt cannot access it.")
-                            else:
-                                raise Exception(f"Cobalt API error: {error_code} - {error_message}")
+                elif data.get("status") in ["tunnel", "redirect"]:
+                    download_url = data.get("url")
+                    filename = data.get("filename", "download")
                         
-                        elif data.get("status") in ["tunnel", "redirect"]:
-                            download_url = data.get("url")
-                            filename = data.get("filename", "download")
-                            
-                            if not download_url:
-                                debug_log("No download URL in response", type_="ERROR")
-                                debug_log(f"Full response data: {data}", type_="INFO")
-                                raise Exception("No download URL received from Cobalt API")
-                            
-                            debug_log(f"Got download URL: {download_url}", type_="SUCCESS")
-                            debug_log(f"Filename: {filename}", type_="INFO")
-                            
-                            try:
-                                file_path = await download_file(download_url, filename, referer=url)
-                                return file_path
-                            except Exception as e:
-                                error_str = str(e)
-                                if "HTTP 403" in error_str:
-                                    if "instagram.com" in url.lower():
-                                        raise Exception("Instagram is blocking the download. Try:\n• Making sure the content is public\n• Waiting a few minutes\n• Using a different Cobalt instance")
-                                    else:
-                                        raise Exception(f"Access denied (403) when downloading. The server is blocking the request. Try again later or use a different Cobalt instance.")
-                                elif "HTTP 429" in error_str:
-                                    raise Exception("Too many requests. Please wait a few minutes before trying again.")
-                                else:
-                                    raise
+                    if not download_url:
+                        debug_log("No download URL in response", type_="ERROR")
+                        debug_log(f"Full response data: {data}", type_="INFO")
+                        raise Exception("No download URL received from Cobalt API")
                         
-                        elif data.get("status") == "picker":
-                            picker_items = data.get("picker", [])
+                    debug_log(f"Got download URL: {download_url}", type_="SUCCESS")
+                    debug_log(f"Filename: {filename}", type_="INFO")
+                        
+                    try:
+                        file_path = await download_file(download_url, filename, referer=url)
+                        return file_path
+                    except Exception as e:
+                        raise download_error(e, url)
+                    
+                elif data.get("status") == "picker":
+                    picker_items = data.get("picker", [])
 
-                            if not picker_items:
-                                debug_log("Empty picker items list", type_="ERROR")
-                                debug_log(f"Full response data: {data}", type_="INFO")
-                                raise Exception("No media items found in picker response")
+                    if not picker_items:
+                        debug_log("Empty picker items list", type_="ERROR")
+                        debug_log(f"Full response data: {data}", type_="INFO")
+                        raise Exception("No media items found in picker response")
 
+                    debug_log(
+                        f"Found {len(picker_items)} media items. Downloading all.",
+                        type_="SUCCESS",
+                    )
+
+                    async def download_picker_item(idx, item_url, item_type, filename):
+                        async with PICKER_DOWNLOAD_SEMAPHORE:
                             debug_log(
-                                f"Found {len(picker_items)} media items. Downloading all.",
-                                type_="SUCCESS",
+                                f"Downloading picker item {idx} - URL: {item_url}, Type: {item_type}",
+                                type_="INFO",
                             )
+                            return await download_file(item_url, filename, referer=url)
 
-                            downloaded_paths = []
-                            for idx, item in enumerate(picker_items, start=1):
-                                item_url = item.get("url", "")
-                                item_type = item.get("type", "unknown")
+                    picker_tasks = []
+                    for idx, item in enumerate(picker_items, start=1):
+                        item_url = item.get("url", "")
+                        item_type = item.get("type", "unknown")
 
-                                if not item_url:
-                                    debug_log(
-                                        f"No URL in picker item {idx}", type_="ERROR"
-                                    )
-                                    continue
+                        if not item_url:
+                            debug_log(
+                                f"No URL in picker item {idx}", type_="ERROR"
+                            )
+                            continue
 
-                                filename = (
-                                    f"cobalt_{idx}_{item_type}_{os.path.basename(item_url)}"
-                                )
-                                if not os.path.splitext(filename)[1]:
-                                    if item_type == "photo":
-                                        filename += ".jpg"
-                                    elif item_type == "video":
-                                        filename += ".mp4"
-                                    elif item_type == "gif":
-                                        filename += ".gif"
-
-                                debug_log(
-                                    f"Downloading picker item {idx} - URL: {item_url}, Type: {item_type}",
-                                    type_="INFO",
-                                )
-                                try:
-                                    path = await download_file(item_url, filename, referer=url)
-
-                                    downloaded_paths.append(path)
-                                except Exception as e:
-                                    error_str = str(e)
-                                    if "HTTP 403" in error_str:
-                                        if "instagram.com" in url.lower():
-                                            raise Exception(
-                                                "Instagram is blocking the download. Try:\n• Making sure the content is public\n• Waiting a few minutes\n• Using a different Cobalt instance"
-                                            )
-                                        else:
-                                            raise Exception(
-                                                "Access denied (403) when downloading. The server is blocking the request. Try again later or use a different Cobalt instance."
-                                            )
-                                    elif "HTTP 429" in error_str:
-                                        raise Exception(
-                                            "Too many requests. Please wait a few minutes before trying again."
-                                        )
-                                    else:
-                                        raise
-
-                            audio_url = data.get("audio")
-                            if audio_url:
-                                audio_filename = data.get(
-                                    "audioFilename",
-                                    f"audio_{os.path.basename(audio_url)}" or "audio",
-                                )
-                                debug_log(
-                                    f"Downloading slideshow audio - URL: {audio_url}",
-                                    type_="INFO",
-                                )
-                                try:
-                                    audio_path = await download_file(
-                                        audio_url, audio_filename, referer=url
-
-                                    )
-                                    downloaded_paths.append(audio_path)
-                                except Exception as e:
-                                    debug_log(
-                                        f"Failed to download slideshow audio: {str(e)}",
-                                        type_="ERROR",
-                                    )
-
-                            if not downloaded_paths:
-                                raise Exception(
-                                    "Failed to download any items from picker response"
-                                )
+                        # Name from the URL path; tunnel URLs carry everything in the
+                        # query string, which sanitize_filename would cut off after the
+                        # extension was added
+                        filename = (
+                            f"cobalt_{idx}_{item_type}_{os.path.basename(urlsplit(item_url).path)}"
+                        )
+                        if not os.path.splitext(filename)[1]:
+                            filename += EXT_BY_TYPE.get(item_type, "")
 
-                            return downloaded_paths
-                        else:
-                            debug_log(f"Unknown status in response: {data.get('status')}", type_="ERROR")
-                            debug_log(f"Full response data: {data}", type_="INFO")
-                            raise Exception(f"Unknown response status: {data.get('status')}")
-                    elif response.status == 400:
-                        error_message = "Bad Request"
+                        picker_tasks.append(
+                            download_picker_item(idx, item_url, item_type, filename)
+                        )
+
+                    # Slideshow audio is downloaded alongside the picker items
+                    async def download_slideshow_audio():
+                        audio_url = data.get("audio")
+                        if not audio_url:
+                            return None
+                        audio_filename = data.get("audioFilename") or (
+                            f"audio_{os.path.basename(urlsplit(audio_url).path)}"
+                        )
+                        debug_log(
+                            f"Downloading slideshow audio - URL: {audio_url}",
+                            type_="INFO",
+                        )
                         try:
-                            if data.get("error"):
-                                error_message = f"{data['error'].get('code', 'unknown')} - {data['error'].get('message', 'No message, Ensure the URL is supported by Cobalt, an unsupported URL was provided')}"
-                        except:
-                            pass
-                        debug_log(f"Cobalt API returned 400 - {error_message}", type_="ERROR")
-                        debug_log(f"Request payload: {payload}", type_="INFO")
-                        debug_log(f"Response data: {data}", type_="INFO")
-                        raise Exception(f"Cobalt API error (400): {error_message}")
-                    else:
-                        debug_log(f"Unexpected HTTP status: {response.status}", type_="ERROR")
-                        debug_log(f"Response data: {data}", type_="INFO")
-                        raise Exception(f"Cobalt API error: HTTP {response.status}")
-                        
+                            return await download_file(
+                                audio_url, audio_filename, referer=url
+                            )
+                        except Exception as e:
+                            debug_log(
+                                f"Failed to download slideshow audio: {str(e)}",
+                                type_="ERROR",
+                            )
+                            return None
+
+                    # Download all items concurrently; results keep picker order
+                    results, audio_path = await asyncio.gather(
+                        asyncio.gather(*picker_tasks, return_exceptions=True),
+                        download_slideshow_audio()
+                    )
+
+                    downloaded_paths = [r for r in results if not isinstance(r, BaseException)]
+                    errors = [r for r in results if isinstance(r, BaseException)]
+                    if errors:
+                        # The whole request fails, so don't leave the items that did download behind
+                        if not keep_files:
+                            await remove_files(*downloaded_paths, audio_path)
+                        raise download_error(errors[0], url)
+
+                    if audio_path:
+                        downloaded_paths.append(audio_path)
+
+                    if not downloaded_paths:
+                        raise Exception(
+                            "Failed to download any items from picker response"
+                        )
+
+                    return downloaded_paths
+                else:
+                    debug_log(f"Unknown status in response: {data.get('status')}", type_="ERROR")
+                    debug_log(f"Full response data: {data}", type_="INFO")
+                    raise Exception(f"Unknown response status: {data.get('status')}")
+            elif status == 400:
+                error_message = "Bad Request"
+                try:
+                    if data.get("error"):
+                        error_message = f"{data['error'].get('code', 'unknown')} - {data['error'].get('message', 'No message, Ensure the URL is supported by Cobalt, an unsupported URL was provided')}"
+                except:
+                    pass
+                debug_log(f"Cobalt API returned 400 - {error_message}", type_="ERROR")
+                debug_log(f"Request payload: {payload}", type_="INFO")
+                debug_log(f"Response data: {data}", type_="INFO")
+                raise Exception(f"Cobalt API error (400): {error_message}")
+            else:
+                debug_log(f"Unexpected HTTP status: {status}", type_="ERROR")
+                debug_log(f"Response data: {data}", type_="INFO")
+                raise Exception(f"Cobalt API error: HTTP {status}")
+                    
         except aiohttp.ClientError as e:
             debug_log(f"Network error: {str(e)}", type_="ERROR")
             debug_log(f"Request URL: {cobalt_base_url}", type_="INFO")
             debug_log(f"Request headers: {headers}", type_="INFO")
             raise Exception(f"Connection error: {str(e)}")
         except Exception as e:
+            # Don't hand out a cached answer that just failed (e.g. an expired tunnel)
+            cobalt_responses.pop(cache_key, None)
             if not str(e).startswith(("Cobalt API error", "Connection error")):
                 debug_log(f"Unexpected error: {str(e)}", type_="ERROR")
             raise
     
     # Helper function to convert video to GIF
-    async def convert_to_gif(video_path, fps, scale, time_range, optimize, speed=1.0):
+    async def convert_to_gif(video_path, fps, scale, time_params, optimize, speed=1.0):
         """Convert video to GIF using FFmpeg and optionally optimize with Giflossy"""
         debug_log(f"Converting video to GIF: {video_path}", type_="INFO")
         
@@ -705,69 +1453,51 @@ def unified_cobalt_script():
         debug_log(f"Work directory: {work_dir}", type_="INFO")
         debug_log(f"Output directory: {output_dir}", type_="INFO")
         
-        # Clean up existing files
-        for file in ["input.mp4", "palette.png", "output.gif", "optimized.gif"]:
-            try:
-                os.remove(os.path.join(work_dir, file))
-                debug_log(f"Cleaned up existing file: {file}", type_="INFO")
-            except:
-                pass
-        
-        # Copy video to work directory
-        input_path = os.path.join(work_dir, "input.mp4")
-        shutil.copy2(video_path, input_path)
-        
         # Generate filename
-        original_filename = os.path.splitext(os.path.basename(video_path))[0]
-        original_filename = re.sub(r'[^\w\-_]', '_', original_filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        gif_filename = f"{original_filename}_{timestamp}.gif"
-        
-        # Setup paths
-        palette_path = os.path.join(work_dir, "palette.png")
-        
-        # Prepare time parameters
-        time_params = ""
-        if time_range:
-            start_time, end_time = time_range.split("-")
-            start_float = float(start_time)
-            end_float = float(end_time)
-            duration = str(end_float - start_float)
-            time_params = f"-ss {start_time} -t {duration}"
-        
-        # Generate palette
-        palette_cmd = (
-            f'docker run --rm -v "{work_dir}:/tmp/work" jrottenberg/ffmpeg '
-            f'-y {time_params} -i /tmp/work/input.mp4 '
-            f'-vf "fps={fps},scale={scale}:flags=lanczos,palettegen" '
-            f'/tmp/work/palette.png'
-        )
-        await run_docker_cmd(palette_cmd)
+        base_name = output_name(video_path)
+        gif_filename = f"{base_name}.gif"
         
-        if not os.path.exists(palette_path):
-            raise Exception(f"Failed to generate palette image")
-        
-        # Convert to GIF
+        # Convert to GIF (palette is generated and applied in the same pass)
         vf_parts = []
 
-        # Ensure consistent frame rate and scaling
-        vf_parts.append(f"fps={fps}")
+        # Ensure consistent frame rate and scaling; a speed change rescales the
+        # timestamps first and keeps `fps` frames per second of source video, up
+        # to GIF_MAX_SPEED_FPS (beyond that frames are dropped instead)
+        if speed != 1.0:
+            vf_parts.append(f"setpts=PTS/{speed}")
+            vf_parts.append(f"fps={min(fps * speed, GIF_MAX_SPEED_FPS):g}")
+        else:
+            vf_parts.append(f"fps={fps}")
         vf_parts.append(f"scale={scale}:flags=lanczos")
 
-        # Palette generation and usage
-        vf_parts.append("split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse=dither=bayer:bayer_scale=5")
+        # Optimized GIFs drop duplicate frames; the GIF muxer stretches the previous
+        # frame's delay instead
+        if optimize:
+            vf_parts.append("mpdecimate")
+
+        # Palette generation and usage (palette trained on changing pixels, sierra2_4a dither)
+        vf_parts.append("split[s0][s1];[s0]palettegen=stats_mode=diff:max_colors=256:reserve_transparent=false[p];[s1][p]paletteuse=dither=sierra2_4a")
         
         # Join filters with commas
         vf_string = ",".join(vf_parts)
         debug_log(f"Using video filter: {vf_string}", type_="INFO")
         
-        gif_cmd = (
-            f'docker run --rm -v "{work_dir}:/tmp/work" -v "{output_dir}:/tmp/output" jrottenberg/ffmpeg '
-            f'-y {time_params} -i /tmp/work/input.mp4 -i /tmp/work/palette.png '
-            f'-lavfi "{vf_string}" '
-            f'/tmp/output/{gif_filename}'
-        )
+        _, _, hw_input_args = ffmpeg_docker_settings()
+        # The source directory is mounted directly so the video doesn't have to be copied
+        src_dir, src_name = os.path.split(video_path)
+        ffmpeg_args = [
+            "-y", *time_params, *hw_input_args, "-i", f"/tmp/src/{src_name}",
+            "-threads", ffmpeg_threads,
+            "-lavfi", vf_string
+        ]
+        if optimize:
+            ffmpeg_args.extend(["-vsync", "vfr"])
         try:
+            gif_cmd = await tool_argv(
+                "ffmpeg", {"/tmp/src": src_dir, "/tmp/output": output_dir},
+                [*ffmpeg_args, f"/tmp/output/{gif_filename}"],
+                readonly=("/tmp/src",)
+            )
             await run_docker_cmd(gif_cmd)
         except Exception as e:
             error_str = str(e)
@@ -777,22 +1507,20 @@ def unified_cobalt_script():
             raise Exception(f"FFmpeg error: {error_str}")
         
         gif_path = os.path.join(output_dir, gif_filename)
-        if not os.path.exists(gif_path):
+        initial_bytes = await file_size(gif_path)
+        if initial_bytes is None:
             raise Exception(f"GIF file not found")
 
-        # Adjust playback speed by modifying frame delay
-        if speed != 1.0:
-            base_delay = 100 / fps
-            new_delay = max(1, int(round(base_delay / speed)))
-            delay_cmd = (
-                f'docker run --rm -v "{output_dir}:/src" dylanninin/giflossy '
-                f'gifsicle --batch --no-warnings --delay={new_delay} /src/{gif_filename}'
-            )
-            await run_docker_cmd(delay_cmd)
-        
         # Check initial size
-        initial_size = os.path.getsize(gif_path) / (1024 * 1024)
-        size_threshold = float(getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8))
+        initial_size = initial_bytes / BYTES_PER_MB
+        final_bytes = initial_bytes
+        size_threshold = float(lb_limit_mb)
+        
+        # Already well under the limit: gifsicle would cost more than it saves
+        if optimize and initial_size < size_threshold * GIF_OPTIMIZE_SKIP_RATIO:
+            debug_log(f"GIF size ({initial_size:.2f}MB) is well under the limit, skipping optimization", type_="INFO")
+            optimize = False
+        
         if initial_size > size_threshold and not optimize:
             debug_log(f"Initial GIF size ({initial_size:.2f}MB) exceeds Discord limit of {size_threshold}MB, skipping optimization", type_="INFO")
             return gif_path, initial_size, None, True  # Return True to indicate it should be uploaded to litterbox
@@ -803,74 +1531,80 @@ def unified_cobalt_script():
             original_size = initial_size
             debug_log(f"Original GIF size: {original_size:.2f}MB", type_="INFO")
             
-            optimized_gif = os.path.join(work_dir, "optimized.gif")
-            giflossy_cmd = (
-                f'docker run --rm -v "{output_dir}:/src" -v "{work_dir}:/dest" dylanninin/giflossy '
-                f'gifsicle --lossy=30 /src/{gif_filename} -o /dest/optimized.gif'
-            )
-            try:
-                await run_docker_cmd(giflossy_cmd)
-            except Exception as e:
-                error_str = str(e)
-                # Truncate long error messages
-                if len(error_str) > 1000:
-                    error_str = error_str[:997] + "..."
-                raise Exception(f"Giflossy error: {error_str}")
+            # Pick the starting lossy level (and palette size) from how far over the limit
+            # the GIF is, so very large GIFs don't pay for a pass that can't get them under it
+            ratio = initial_size / size_threshold
+            if ratio < 1.5:
+                start_level, color_args = 0, []
+            elif ratio < 3:
+                start_level, color_args = 1, ["--colors=128"]
+            else:
+                start_level, color_args = 2, ["--colors=64"]
             
-            if os.path.exists(optimized_gif):
-                optimized_size = os.path.getsize(optimized_gif) / (1024 * 1024)
-                size_reduction = ((original_size - optimized_size) / original_size) * 100
-                
-                if optimized_size > size_threshold:
-                    debug_log("GIF still too large, trying higher compression", type_="INFO")
-                    # Instead of optimizing the already optimized file, optimize the original with higher lossy value
-                    giflossy_cmd = (
-                        f'docker run --rm -v "{output_dir}:/src" -v "{work_dir}:/dest" dylanninin/giflossy '
-                        f'gifsicle --lossy=60 /src/{gif_filename} -o /dest/optimized.gif'
-                    )
-                    try:
-                        await run_docker_cmd(giflossy_cmd)
-                    except Exception as e:
-                        error_str = str(e)
-                        # Truncate long error messages
-                        if len(error_str) > 1000:
-                            error_str = error_str[:997] + "..."
-                        raise Exception(f"Giflossy error: {error_str}")
-                    
-                    if os.path.exists(optimized_gif):
-                        optimized_size = os.path.getsize(optimized_gif) / (1024 * 1024)
-                        size_reduction = ((original_size - optimized_size) / original_size) * 100
-                        
-                        if optimized_size > size_threshold:
-                            debug_log("GIF still too large after second optimization", type_="INFO")
-                            return gif_path, optimized_size, original_size, True  # Return True to indicate it should be uploaded to litterbox
-                        else:
-                            os.remove(gif_path)
-                            shutil.move(optimized_gif, gif_path)
-                    else:
-                        raise Exception("Second optimization failed")
-                else:
-                    os.remove(gif_path)
-                    shutil.move(optimized_gif, gif_path)
+            # Helper function to run one lossy pass into its own file
+            async def lossy_pass(lossy):
+                """Optimize the original GIF at a lossy level and return (size in bytes, path)"""
+                debug_log(f"Optimizing GIF with lossy={lossy} (size ratio {ratio:.2f})", type_="INFO")
+                optimized_name = f"{base_name}_lossy{lossy}.gif"
+                # Always optimize the original rather than an already optimized file
+                giflossy_cmd = await tool_argv("gifsicle", {"/src": output_dir, "/dest": work_dir}, [
+                    "-O3", f"--lossy={lossy}", *color_args, *GIFSICLE_STRIP_ARGS,
+                    f"/src/{gif_filename}", "-o", f"/dest/{optimized_name}"
+                ])
+                try:
+                    await run_docker_cmd(giflossy_cmd)
+                except Exception as e:
+                    error_str = str(e)
+                    # Truncate long error messages
+                    if len(error_str) > 1000:
+                        error_str = error_str[:997] + "..."
+                    raise Exception(f"Giflossy error: {error_str}")
+                optimized_path = os.path.join(work_dir, optimized_name)
+                optimized_bytes = await file_size(optimized_path)
+                if optimized_bytes is None:
+                    raise Exception("GIF optimization failed")
+                return optimized_bytes, optimized_path
+            
+            pending = list(GIFSICLE_LOSSY_LEVELS[start_level:])
+            batch_size = 2 if ratio >= GIF_PARALLEL_LOSSY_RATIO else 1
+            best = None
+            while pending:
+                batch, pending = pending[:batch_size], pending[batch_size:]
+                results = await asyncio.gather(*(lossy_pass(lossy) for lossy in batch), return_exceptions=True)
+                passes = [r for r in results if not isinstance(r, BaseException)]
+                errors = [r for r in results if isinstance(r, BaseException)]
+                if best is not None:
+                    passes.append(best)
+                # Keep the lowest lossy level that fits (results are in level order),
+                # otherwise the smallest file so far
+                fitting = [r for r in passes if r[0] <= lb_limit_bytes]
+                chosen = fitting[0] if fitting else min(passes, default=None)
+                await remove_files(*(path for _, path in passes if chosen is None or path != chosen[1]))
+                if errors:
+                    await remove_files(chosen and chosen[1])
+                    raise errors[0]
+                best = chosen
+                if fitting:
+                    break
+                debug_log("GIF still too large, trying higher compression", type_="INFO")
+            
+            optimized_bytes, optimized_gif = best
+            if optimized_bytes < initial_bytes:
+                # The work directory lives inside the download path, so this is a
+                # rename on the same filesystem that also replaces the original
+                await asyncio.to_thread(os.replace, optimized_gif, gif_path)
+                final_bytes = optimized_bytes
             else:
-                raise Exception("GIF optimization failed")
+                # gifsicle recompresses every frame and can make a GIF bigger
+                debug_log("Optimized GIF is not smaller, keeping the original", type_="INFO")
+                await remove_files(optimized_gif)
         
-        # Check final size
-        final_size = os.path.getsize(gif_path) / (1024 * 1024)
+        # Check final size, reusing the size already known
+        final_size = final_bytes / BYTES_PER_MB
         if final_size > size_threshold:
             debug_log(f"Final GIF size ({final_size:.2f}MB) exceeds Discord limit of {size_threshold}MB", type_="INFO")
             return gif_path, final_size, original_size, True  # Return True to indicate it should be uploaded to litterbox
         
-        # Clean up
-        try:
-            for file in ["input.mp4", "palette.png"]:
-                try:
-                    os.remove(os.path.join(work_dir, file))
-                except:
-                    pass
-        except Exception as e:
-            debug_log(f"Cleanup error: {str(e)}", type_="ERROR")
-        
         return gif_path, final_size, original_size, False  # Return False to indicate it should be sent to Discord
 
     # Helper function to upload files to litterbox.catbox.moe
@@ -883,19 +1617,28 @@ def unified_cobalt_script():
         debug_log(f"Uploading file to litterbox.catbox.moe: {file_path}", type_="INFO")
         
         try:
-            # Read the file content first
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-            
-            async with aiohttp.ClientSession() as session:
+            # The open file is streamed by aiohttp in chunks rather than read into memory;
+            # opening and closing it happen in a worker thread, as in download_file, and
+            # the 1 MB buffer matches send_file
+            f = await asyncio.to_thread(open, file_path, 'rb', 1 << 20)
+            try:
+                session = await get_session()
                 # Prepare the file for upload
                 data = aiohttp.FormData()
-                data.add_field('fileToUpload', file_content, filename=os.path.basename(file_path))
+                data.add_field(
+                    'fileToUpload', f,
+                    filename=os.path.basename(file_path),
+                    content_type='application/octet-stream'
+                )
                 data.add_field('reqtype', 'fileupload')
-                data.add_field('time', getConfigData().get(LITTERBOX_EXPIRY_KEY, "24h"))  # Use configured expiry time
+                data.add_field('time', lb_expiry)  # Use configured expiry time
                 
-                # Upload the file
-                async with session.post('https://litterbox.catbox.moe/resources/internals/api.php', data=data) as response:
+                # Upload the file (no overall deadline; large files can take a while)
+                async with session.post(
+                    'https://litterbox.catbox.moe/resources/internals/api.php',
+                    data=data,
+                    timeout=aiohttp.ClientTimeout(total=None, sock_read=120)
+                ) as response:
                     if response.status == 200:
                         url = await response.text()
                         if url.startswith('https://'):
@@ -905,146 +1648,316 @@ def unified_cobalt_script():
                             raise Exception(f"Invalid response from litterbox: {url}")
                     else:
                         raise Exception(f"Failed to upload file: HTTP {response.status}")
+            finally:
+                await asyncio.to_thread(f.close)
         except Exception as e:
             debug_log(f"Error uploading to litterbox: {str(e)}", type_="ERROR")
             raise
 
+    # Helper function to send a command's output or upload it to litterbox
+    async def deliver_file(ctx, msg, path, size_bytes, caption=None):
+        """Send path to Discord, or to litterbox if it is over the limit or Discord rejects it"""
+        # Each status edit runs alongside its upload instead of delaying it by a
+        # Discord round-trip; both finish before the message is edited again
+        if size_bytes <= lb_limit_bytes:
+            _, result = await asyncio.gather(
+                msg.edit(content=f"sending file ({size_bytes / BYTES_PER_MB:.2f}mb)..."),
+                send_file(ctx, path, caption),
+                return_exceptions=True
+            )
+            if not isinstance(result, Exception):
+                await msg.delete()
+                return
+            if PAYLOAD_TOO_LARGE not in str(result):
+                await msg.edit(content=f"error sending file: {str(result)}")
+                return
+        _, result = await asyncio.gather(
+            msg.edit(content="file exceeds discord limit, uploading to litterbox.catbox.moe..."),
+            upload_to_litterbox(path),
+            return_exceptions=True
+        )
+        try:
+            if isinstance(result, Exception):
+                raise result
+            notice = f"📁 file uploaded to: {result}\n⚠️ note: this link will expire in {lb_expiry}"
+            await ctx.send(f"{caption}\n{notice}" if caption else notice)
+            await msg.delete()
+        except Exception as e:
+            await msg.edit(content=f"failed to upload to litterbox: {str(e)}")
+
+    # Helper function to turn a command error into a user-facing message
+    def error_message(error_str, too_large_msg, pattern, messages, fallback):
+        """Return the message for the first known error found in error_str"""
+        match = pattern.search(error_str)
+        if match is None:
+            return fallback
+        if match.group(0) == PAYLOAD_TOO_LARGE:
+            return too_large_msg
+        return messages[match.group(0)]
+
+    # Helper function to set the Cobalt instance URL
+    async def config_url(ctx, value, command_name):
+        """Set the Cobalt instance URL"""
+        url = value
+        if url.startswith("http://") or url.startswith("https://"):
+            updateConfigData(COBALT_URL_KEY, url)
+            refresh_config()
+            debug_log(f"Cobalt URL updated to: {url}", type_="SUCCESS")
+            await ctx.send(f"✅ Cobalt instance URL set to: {url}")
+        else:
+            debug_log(f"Invalid URL format attempted: {url}", type_="ERROR")
+            await ctx.send("❌ Invalid URL format. Should start with http:// or https://")
+
+    # Helper function to set the download path
+    async def config_path(ctx, value, command_name):
+        """Create and set the download directory"""
+        path = value
+        try:
+            os.makedirs(path, exist_ok=True)
+            updateConfigData(DOWNLOAD_PATH_KEY, path)
+            refresh_config()
+            debug_log(f"Download path updated to: {path}", type_="SUCCESS")
+            await ctx.send(f"✅ Download path set to: {path}")
+        except Exception as e:
+            debug_log(f"Error setting path: {str(e)}", type_="ERROR")
+            await ctx.send(f"❌ Error setting path: {str(e)}")
+
+    # Helper function to toggle debug logging
+    async def config_debug(ctx, value, command_name):
+        """Toggle debug logging"""
+        debug_enabled = not debug_logging
+        updateConfigData(DEBUG_ENABLED_KEY, debug_enabled)
+        refresh_config()
+        debug_log(f"Debug mode {'enabled' if debug_enabled else 'disabled'}", type_="SUCCESS")
+        await ctx.send(f"✅ Debug mode {'enabled' if debug_enabled else 'disabled'}")
+
+    # Helper function to toggle persistent storage
+    async def config_persistent(ctx, value, command_name):
+        """Toggle keeping downloaded and converted files"""
+        persistent_enabled = not keep_files
+        updateConfigData(PERSISTENT_STORAGE_KEY, persistent_enabled)
+        refresh_config()
+        debug_log(f"Persistent storage {'enabled' if persistent_enabled else 'disabled'}", type_="SUCCESS")
+        await ctx.send(f"✅ Persistent storage {'enabled' if persistent_enabled else 'disabled'}")
+
+    # Helper function to toggle reusing existing downloads
+    async def config_reuse(ctx, value, command_name):
+        """Toggle reusing files already in persistent storage"""
+        reuse_enabled = not reuse_existing
+        updateConfigData(REUSE_EXISTING_KEY, reuse_enabled)
+        refresh_config()
+        debug_log(f"Reusing existing files {'enabled' if reuse_enabled else 'disabled'}", type_="SUCCESS")
+        await ctx.send(f"✅ Reusing existing files {'enabled' if reuse_enabled else 'disabled'}")
+
+    # Helper function to toggle the worker containers
+    async def config_workers(ctx, value, command_name):
+        """Toggle long-lived ffmpeg/gifsicle containers"""
+        workers_enabled = not use_workers
+        updateConfigData(WORKER_CONTAINERS_KEY, workers_enabled)
+        refresh_config()
+        if workers_enabled:
+            # Start the containers now so the first command doesn't wait for them
+            warm_workers()
+        else:
+            await asyncio.to_thread(stop_worker_containers)
+        debug_log(f"Worker containers {'enabled' if workers_enabled else 'disabled'}", type_="SUCCESS")
+        await ctx.send(f"✅ Worker containers {'enabled' if workers_enabled else 'disabled'}")
+
+    # Helper function to toggle a host-installed tool
+    async def config_host(ctx, value, command_name, tool):
+        """Toggle running tool from the host instead of docker"""
+        host_enabled = tool not in host_tools
+        if host_enabled and shutil.which(tool) is None:
+            await ctx.send(f"❌ {tool} was not found on PATH. Install it on the host first.")
+            return
+        updateConfigData(HOST_TOOL_KEYS[tool], host_enabled)
+        refresh_config()
+        debug_log(f"Host {tool} {'enabled' if host_enabled else 'disabled'}", type_="SUCCESS")
+        await ctx.send(f"✅ Host {tool} {'enabled' if host_enabled else 'disabled'}")
+
+    # Helper function to set the litterbox expiry
+    async def config_lb(ctx, value, command_name):
+        """Set how long litterbox uploads are kept"""
+        hours = value.lower()
+        valid_times = {"1": "1h", "12": "12h", "24": "24h", "72": "72h"}
+        if hours in valid_times:
+            updateConfigData(LITTERBOX_EXPIRY_KEY, valid_times[hours])
+            refresh_config()
+            debug_log(f"Litterbox expiry time updated to: {valid_times[hours]}", type_="SUCCESS")
+            await ctx.send(f"✅ Litterbox file expiry set to {valid_times[hours]}")
+        else:
+            debug_log(f"Invalid litterbox time attempted: {hours}", type_="ERROR")
+            await ctx.send("❌ Invalid time. Use 1, 12, 24, or 72 hours")
+
+    # Helper function to set the litterbox size limit
+    async def config_limit(ctx, value, command_name):
+        """Set the size above which files go to litterbox"""
+        try:
+            threshold_mb = float(value)
+            if threshold_mb <= 0:
+                await ctx.send("❌ Limit must be a positive number of megabytes.")
+                return
+            updateConfigData(LITTERBOX_SIZE_THRESHOLD_MB_KEY, threshold_mb)
+            refresh_config()
+            debug_log(f"Litterbox upload limit set to {threshold_mb}MB", type_="SUCCESS")
+            await ctx.send(f"✅ Litterbox upload limit set to: {threshold_mb} MB")
+        except ValueError:
+            await ctx.send(f"❌ Invalid limit. Provide a number in megabytes (e.g., `<p>{command_name} limit 20>`).")
+
+    # Helper function to set the concurrent job count
+    async def config_jobs(ctx, value, command_name):
+        """Set how many ffmpeg/gifsicle jobs run at once"""
+        value = value.lower()
+        if value == "auto":
+            updateConfigData(DOCKER_JOBS_KEY, None)
+        elif value.isdigit() and int(value) > 0:
+            updateConfigData(DOCKER_JOBS_KEY, int(value))
+        else:
+            await ctx.send("❌ Invalid job count. Use a positive number or auto")
+            return
+        refresh_config()
+        debug_log(f"Concurrent jobs set to {docker_jobs} ({ffmpeg_threads} ffmpeg threads each)", type_="SUCCESS")
+        await ctx.send(f"✅ Concurrent jobs set to: {docker_jobs} ({ffmpeg_threads} ffmpeg threads each)")
+
+    # Helper function to set the ffmpeg threads per job
+    async def config_threads(ctx, value, command_name):
+        """Set the -threads value given to each ffmpeg run"""
+        value = value.lower()
+        if value == "auto":
+            updateConfigData(FFMPEG_THREADS_KEY, None)
+        elif value.isdigit() and int(value) > 0:
+            updateConfigData(FFMPEG_THREADS_KEY, int(value))
+        else:
+            await ctx.send("❌ Invalid thread count. Use a positive number or auto")
+            return
+        refresh_config()
+        debug_log(f"FFmpeg threads per job set to {ffmpeg_threads}", type_="SUCCESS")
+        await ctx.send(f"✅ FFmpeg threads per job set to: {ffmpeg_threads}")
+
+    # Helper function to set the FFmpeg hwaccel mode
+    async def config_hwaccel(ctx, value, command_name):
+        """Set FFmpeg hardware decoding"""
+        mode = value.lower()
+        if mode == "detect":
+            mode = detect_hwaccel()
+        if mode in FFMPEG_HWACCEL_DOCKER:
+            updateConfigData(FFMPEG_HWACCEL_KEY, mode)
+            refresh_config()
+            debug_log(f"FFmpeg hwaccel set to {mode}", type_="SUCCESS")
+            await ctx.send(f"✅ FFmpeg hardware decoding set to: {mode}")
+        else:
+            await ctx.send("❌ Invalid hwaccel mode. Use auto, cuda, vaapi, none, or detect")
+
+    # Helper function to show the configuration status
+    async def config_status(ctx, value, command_name):
+        """Show the Cobalt instance, tools and settings"""
+        # "status refresh" re-runs the docker version checks and re-asks the instance
+        if value.lower() == "refresh":
+            tool_versions.clear()
+            cobalt_info.clear()
+        msg = await ctx.send("🔍 Checking configuration...")
+        try:
+            # The cached values are current; every config action refreshes them
+            cobalt_url = cobalt_base_url
+            download_path = base_download_path
+            debug_enabled = debug_logging
+            persistent_enabled = keep_files
+            
+            status, data = await get_cobalt_info(cobalt_url)
+            if status == 200:
+                version = data.get("cobalt", {}).get("version", "Unknown")
+                services = data.get("cobalt", {}).get("services", [])
+                duration_limit = data.get("cobalt", {}).get("durationLimit", "Unknown")
+                    
+                # Both probes may start a container, so run them side by side
+                ffmpeg_status, gifsicle_status = await asyncio.gather(
+                    tool_status("ffmpeg", "🔄", "-version"),
+                    tool_status("gifsicle", "🎨", "--version")
+                )
+                    
+                path_exists = os.path.exists(download_path)
+                path_writable = os.access(download_path, os.W_OK) if path_exists else False
+                    
+                await msg.delete()
+                    
+                status_content = (
+                    f"**Cobalt Instance Status**\n"
+                    f"URL: `{cobalt_url}`\n"
+                    f"Version: `{version}`\n"
+                    f"Duration Limit: `{duration_limit} seconds`\n"
+                    f"Supported Services: `{', '.join(services)}`\n\n"
+                    f"{ffmpeg_status}"
+                    f"{gifsicle_status}"
+                    f"**📁 Download Path**:\n"
+                    f"```{download_path}```\n"
+                    f"**🔍 Path Status**: {'✅' if path_exists else '❌'} Exists, {'✅' if path_writable else '❌'} Writable\n\n"
+                    f"**⚙️ Features**:\n"
+                    f"{'✅' if debug_enabled else '❌'} 🐛 Debug Mode\n"
+                    f"{'✅' if persistent_enabled else '❌'} Persistent Storage\n"
+                    f"{'✅' if reuse_existing else '❌'} Reuse Existing Files\n"
+                    f"{'✅' if use_workers else '❌'} Worker Containers\n"
+                    f"{'✅' if 'ffmpeg' in host_tools else '❌'} Host ffmpeg{host_hint('ffmpeg')}\n"
+                    f"{'✅' if 'gifsicle' in host_tools else '❌'} Host gifsicle{host_hint('gifsicle')}\n"
+                    f"**📤 Litterbox**: {lb_expiry} expiry, {lb_limit_mb}MB limit\n"
+                    f"**🖥️ FFmpeg hwaccel**: {ffmpeg_hwaccel}\n"
+                    f"**⚡ Jobs**: {docker_jobs} at once, {ffmpeg_threads} ffmpeg threads each\n\n"
+                    f"**📊 Default Settings**:\n"
+                    f"• 🎬 FPS: 15\n"
+                    f"• 📏 Scale: 480:-1 (480px width, auto height)\n"
+                    f"• ⏱️ Time Range: Entire video (if not specified)\n"
+                    f"• 🔧 Optimization: Disabled by default\n"
+                    f"• 💾 Storage: media subfolder when persistent"
+                )
+                    
+                current_private = getConfigData().get("private")
+                updateConfigData("private", False)
+                    
+                await forwardEmbedMethod(
+                    channel_id=ctx.channel.id,
+                    content=status_content,
+                    title=f"{command_name} Status"
+                )
+                    
+                updateConfigData("private", current_private)
+            else:
+                error_msg = f"❌ Cobalt instance at {cobalt_url} returned status {status}"
+                debug_log(error_msg, type_="ERROR")
+                await msg.edit(content=error_msg)
+        except Exception as e:
+            error_msg = f"❌ Could not connect to Cobalt instance at {cobalt_url}. Error: {str(e)}"
+            debug_log(error_msg, type_="ERROR")
+            await msg.edit(content=error_msg)
+
+    # Config actions: name -> (handler, whether the action needs a value)
+    config_actions = {
+        "url": (config_url, True),
+        "path": (config_path, True),
+        "debug": (config_debug, False),
+        "persistent": (config_persistent, False),
+        "reuse": (config_reuse, False),
+        "workers": (config_workers, False),
+        "hostffmpeg": (functools.partial(config_host, tool="ffmpeg"), False),
+        "hostgifsicle": (functools.partial(config_host, tool="gifsicle"), False),
+        "lb": (config_lb, True),
+        "limit": (config_limit, True),
+        "jobs": (config_jobs, True),
+        "threads": (config_threads, True),
+        "hwaccel": (config_hwaccel, True),
+        "status": (config_status, False),
+    }
+
     # Shared configuration command handler
     async def handle_config_command(ctx, args, command_name):
         """Handle configuration commands for both Cobalt and CobaltGIF"""
         args_parts = args.strip().split(' ', 1)
         action = args_parts[0].lower()
+        value = args_parts[1].strip() if len(args_parts) > 1 else ""
         
-        if action == "url" and len(args_parts) > 1:
-            url = args_parts[1].strip()
-            if url.startswith("http://") or url.startswith("https://"):
-                updateConfigData(COBALT_URL_KEY, url)
-                debug_log(f"Cobalt URL updated to: {url}", type_="SUCCESS")
-                await ctx.send(f"✅ Cobalt instance URL set to: {url}")
-            else:
-                debug_log(f"Invalid URL format attempted: {url}", type_="ERROR")
-                await ctx.send("❌ Invalid URL format. Should start with http:// or https://")
-        
-        elif action == "path" and len(args_parts) > 1:
-            path = args_parts[1].strip()
-            try:
-                os.makedirs(path, exist_ok=True)
-                updateConfigData(DOWNLOAD_PATH_KEY, path)
-                debug_log(f"Download path updated to: {path}", type_="SUCCESS")
-                await ctx.send(f"✅ Download path set to: {path}")
-            except Exception as e:
-                debug_log(f"Error setting path: {str(e)}", type_="ERROR")
-                await ctx.send(f"❌ Error setting path: {str(e)}")
-        
-        elif action == "debug":
-            debug_enabled = not getConfigData().get(DEBUG_ENABLED_KEY, False)
-            updateConfigData(DEBUG_ENABLED_KEY, debug_enabled)
-            debug_log(f"Debug mode {'enabled' if debug_enabled else 'disabled'}", type_="SUCCESS")
-            await ctx.send(f"✅ Debug mode {'enabled' if debug_enabled else 'disabled'}")
-        
-        elif action == "persistent":
-            persistent_enabled = not getConfigData().get(PERSISTENT_STORAGE_KEY, False)
-            updateConfigData(PERSISTENT_STORAGE_KEY, persistent_enabled)
-            debug_log(f"Persistent storage {'enabled' if persistent_enabled else 'disabled'}", type_="SUCCESS")
-            await ctx.send(f"✅ Persistent storage {'enabled' if persistent_enabled else 'disabled'}")
-        
-        elif action == "lb" and len(args_parts) > 1:
-            time = args_parts[1].strip().lower()
-            valid_times = {"1": "1h", "12": "12h", "24": "24h", "72": "72h"}
-            if time in valid_times:
-                updateConfigData(LITTERBOX_EXPIRY_KEY, valid_times[time])
-                debug_log(f"Litterbox expiry time updated to: {valid_times[time]}", type_="SUCCESS")
-                await ctx.send(f"✅ Litterbox file expiry set to {valid_times[time]}")
-            else:
-                debug_log(f"Invalid litterbox time attempted: {time}", type_="ERROR")
-                await ctx.send("❌ Invalid time. Use 1, 12, 24, or 72 hours")
-
-        elif action == "limit" and len(args_parts) > 1:
-            try:
-                threshold_mb = float(args_parts[1].strip())
-                if threshold_mb <= 0:
-                    await ctx.send("❌ Limit must be a positive number of megabytes.")
-                    return
-                updateConfigData(LITTERBOX_SIZE_THRESHOLD_MB_KEY, threshold_mb)
-                debug_log(f"Litterbox upload limit set to {threshold_mb}MB", type_="SUCCESS")
-                await ctx.send(f"✅ Litterbox upload limit set to: {threshold_mb} MB")
-            except ValueError:
-                await ctx.send(f"❌ Invalid limit. Provide a number in megabytes (e.g., `<p>{command_name} limit 20>`).")
-        
-        elif action == "status":
-            msg = await ctx.send("🔍 Checking configuration...")
-            try:
-                cobalt_url = getConfigData().get(COBALT_URL_KEY, "http://localhost:9000")
-                download_path = getConfigData().get(DOWNLOAD_PATH_KEY)
-                debug_enabled = getConfigData().get(DEBUG_ENABLED_KEY, False)
-                persistent_enabled = getConfigData().get(PERSISTENT_STORAGE_KEY, False)
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(cobalt_url, timeout=5) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            version = data.get("cobalt", {}).get("version", "Unknown")
-                            services = data.get("cobalt", {}).get("services", [])
-                            duration_limit = data.get("cobalt", {}).get("durationLimit", "Unknown")
-                            
-                            ffmpeg_version = await run_docker_cmd("docker run --rm jrottenberg/ffmpeg:latest -version")
-                            ffmpeg_version = ffmpeg_version.split('\n')[0]
-                            ffmpeg_version = re.sub(r'ffmpeg version (\d+\.\d+).*', r'ffmpeg version \1', ffmpeg_version)
-                            
-                            giflossy_version = await run_docker_cmd("docker run --rm dylanninin/giflossy gifsicle --version")
-                            giflossy_version = giflossy_version.split('\n')[0]
-                            
-                            path_exists = os.path.exists(download_path)
-                            path_writable = os.access(download_path, os.W_OK) if path_exists else False
-                            
-                            await msg.delete()
-                            
-                            status_content = (
-                                f"**Cobalt Instance Status**\n"
-                                f"URL: `{cobalt_url}`\n"
-                                f"Version: `{version}`\n"
-                                f"Duration Limit: `{duration_limit} seconds`\n"
-                                f"Supported Services: `{', '.join(services)}`\n\n"
-                                f"**🔄 Docker FFmpeg**: ✅ Working\n"
-                                f"```{ffmpeg_version}```\n"
-                                f"**🎨 Docker Giflossy**: ✅ Working\n"
-                                f"```{giflossy_version}```\n"
-                                f"**📁 Download Path**:\n"
-                                f"```{download_path}```\n"
-                                f"**🔍 Path Status**: {'✅' if path_exists else '❌'} Exists, {'✅' if path_writable else '❌'} Writable\n\n"
-                                f"**⚙️ Features**:\n"
-                                f"{'✅' if debug_enabled else '❌'} 🐛 Debug Mode\n"
-                                f"{'✅' if persistent_enabled else '❌'} Persistent Storage\n"
-                                f"**📤 Litterbox**: {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')} expiry, {getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8)}MB limit\n\n"
-                                f"**📊 Default Settings**:\n"
-                                f"• 🎬 FPS: 15\n"
-                                f"• 📏 Scale: 480:-1 (480px width, auto height)\n"
-                                f"• ⏱️ Time Range: Entire video (if not specified)\n"
-                                f"• 🔧 Optimization: Disabled by default\n"
-                                f"• 💾 Storage: media subfolder when persistent"
-                            )
-                            
-                            current_private = getConfigData().get("private")
-                            updateConfigData("private", False)
-                            
-                            await forwardEmbedMethod(
-                                channel_id=ctx.channel.id,
-                                content=status_content,
-                                title=f"{command_name} Status"
-                            )
-                            
-                            updateConfigData("private", current_private)
-                        else:
-                            error_msg = f"❌ Cobalt instance at {cobalt_url} returned status {response.status}"
-                            debug_log(error_msg, type_="ERROR")
-                            await msg.edit(content=error_msg)
-            except Exception as e:
-                error_msg = f"❌ Could not connect to Cobalt instance at {cobalt_url}. Error: {str(e)}"
-                debug_log(error_msg, type_="ERROR")
-                await msg.edit(content=error_msg)
-        
-        else:
-            await ctx.send(f"❌ Invalid command. Use `<p>{command_name} url <your_url>`, `<p>{command_name} path <download_path>`, `<p>{command_name} debug`, `<p>{command_name} persistent`, `<p>{command_name} lb <1|12|24|72>`, or `<p>{command_name} limit <size_mb>`")
+        handler, needs_value = config_actions.get(action, (None, False))
+        if handler is None or (needs_value and not value):
+            await ctx.send(f"❌ Invalid command. Use `<p>{command_name} url <your_url>`, `<p>{command_name} path <download_path>`, `<p>{command_name} debug`, `<p>{command_name} persistent`, `<p>{command_name} reuse`, `<p>{command_name} workers`, `<p>{command_name} hostffmpeg`, `<p>{command_name} hostgifsicle`, `<p>{command_name} lb <1|12|24|72>`, `<p>{command_name} limit <size_mb>`, `<p>{command_name} jobs <n|auto>`, `<p>{command_name} threads <n|auto>`, or `<p>{command_name} hwaccel <auto|cuda|vaapi|none|detect>`")
+            return
+        await handler(ctx, value, command_name)
     
     @bot.command(name="cobalt", aliases=["c"], description="Download media using Cobalt")
     async def cobalt_command(ctx, *, args: str = ""):
@@ -1052,7 +1965,7 @@ def unified_cobalt_script():
         await ctx.message.delete()
         
         # Handle configuration commands
-        if args.lower().startswith(("url ", "path ", "debug", "persistent", "lb", "limit")):
+        if CONFIG_COMMAND_RE.match(args):
             await handle_config_command(ctx, args, "cobalt")
             return
         
@@ -1061,12 +1974,6 @@ def unified_cobalt_script():
             await ctx.send("❌ Please provide a URL to download.")
             return
         
-        # Validate that the first word is a URL before parsing
-        first_word = args.split()[0].lower()
-        if first_word in ["url", "path", "debug", "persistent", "lb", "limit", "status"]:
-            await handle_config_command(ctx, args, "cobalt")
-            return
-        
         parsed_args = parse_cobalt_args(args)
         url_to_download = parsed_args["url"]
         
@@ -1086,61 +1993,65 @@ def unified_cobalt_script():
             )
 
             file_paths = file_result if isinstance(file_result, list) else [file_result]
-            size_threshold = float(getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8))
+            file_sizes = await asyncio.to_thread(lambda: {path: os.path.getsize(path) for path in file_paths})
+            oversized = [path for path in file_paths if file_sizes[path] > lb_limit_bytes]
 
-            for path in file_paths:
-                file_size = os.path.getsize(path) / (1024 * 1024)
-                if file_size > size_threshold:
-                    await msg.edit(content="⏳ File exceeds Discord limit, uploading to litterbox.catbox.moe...")
-                    try:
-                        litterbox_url = await upload_to_litterbox(path)
-                        await ctx.send(
-                            f"📁 File uploaded to: {litterbox_url}\n⚠️ Note: This link will expire in {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')}"
-                        )
-                        await msg.delete()
-                    except Exception as upload_error:
-                        await msg.edit(content=f"❌ Failed to upload to litterbox: {str(upload_error)}")
-                else:
-                    await msg.edit(content=f"⏳ Sending file ({file_size:.2f} MB)")
+            # Upload everything over the limit to litterbox at once instead of one by one
+            async def upload_bounded(path):
+                async with LITTERBOX_UPLOAD_SEMAPHORE:
+                    return await upload_to_litterbox(path)
+
+            if oversized:
+                await msg.edit(content="⏳ File exceeds Discord limit, uploading to litterbox.catbox.moe...")
+            upload_results = await asyncio.gather(
+                *(upload_bounded(path) for path in oversized),
+                return_exceptions=True
+            )
+            litterbox_results = dict(zip(oversized, upload_results))
+
+            # Send results in order so slideshows keep their sequence
+            try:
+                for path in file_paths:
+                    if path in litterbox_results:
+                        result = litterbox_results[path]
+                        if isinstance(result, Exception):
+                            await ctx.send(f"❌ Failed to upload to litterbox: {str(result)}")
+                        else:
+                            await ctx.send(
+                                f"📁 File uploaded to: {result}\n⚠️ Note: This link will expire in {lb_expiry}"
+                            )
+                        continue
+
+                    size_mb = file_sizes[path] / BYTES_PER_MB
+                    await msg.edit(content=f"⏳ Sending file ({size_mb:.2f} MB)")
                     try:
-                        await ctx.send(file=discord.File(path))
-                        await msg.delete()
+                        await send_file(ctx, path)
                     except Exception as e:
-                        if "413 Payload Too Large" in str(e):
+                        if PAYLOAD_TOO_LARGE in str(e):
                             await msg.edit(content="⏳ File too large for Discord, uploading to litterbox.catbox.moe...")
                             try:
                                 litterbox_url = await upload_to_litterbox(path)
                                 await ctx.send(
-                                    f"📁 File uploaded to: {litterbox_url}\n⚠️ Note: This link will expire in {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')}"
+                                    f"📁 File uploaded to: {litterbox_url}\n⚠️ Note: This link will expire in {lb_expiry}"
                                 )
-                                await msg.delete()
                             except Exception as upload_error:
-                                await msg.edit(content=f"❌ Failed to upload to litterbox: {str(upload_error)}")
+                                await ctx.send(f"❌ Failed to upload to litterbox: {str(upload_error)}")
                         else:
                             raise
-
-                if not getConfigData().get(PERSISTENT_STORAGE_KEY, False):
-                    try:
-                        os.remove(path)
-                        debug_log(f"Temporary file deleted: {path}", type_="SUCCESS")
-                    except Exception as e:
-                        debug_log(f"Error deleting temporary file: {str(e)}", type_="ERROR")
+                await msg.delete()
+            finally:
+                if not keep_files:
+                    cleanup_files(*file_paths)
         
         except Exception as e:
             error_str = str(e)
-            if "413 Payload Too Large" in error_str:
-                limit_mb = getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8)
-                user_msg = f"❌ File exceeds Discord's {limit_mb}MB limit. Try downloading with lower quality."
-            elif "invalid or not supported by Cobalt" in error_str:
-                user_msg = "❌ The URL you provided is invalid or not supported by Cobalt. Please check the URL and try again."
-            elif "website is not supported by Cobalt" in error_str:
-                user_msg = "❌ This website is not supported by Cobalt. Please try a different URL."
-            elif "content is private or requires authentication" in error_str:
-                user_msg = "❌ This content is private or requires authentication. Cobalt cannot access it."
-            else:
-                user_msg = f"❌ Error: {error_str}"
-                if "0 bytes" in error_str:
-                    user_msg += "\nThis might be due to anti-bot measures. Try again in a few minutes."
+            fallback = f"❌ Error: {error_str}"
+            if "0 bytes" in error_str:
+                fallback += "\nThis might be due to anti-bot measures. Try again in a few minutes."
+            user_msg = error_message(
+                error_str, f"❌ File exceeds Discord's {lb_limit_mb}MB limit. Try downloading with lower quality.",
+                COBALT_ERROR_RE, COBALT_ERROR_MESSAGES, fallback
+            )
             debug_log(f"Error: {error_str}", type_="ERROR")
             await msg.edit(content=user_msg)
     
@@ -1150,7 +2061,7 @@ def unified_cobalt_script():
         await ctx.message.delete()
         
         # Handle configuration commands
-        if args.lower().startswith(("url ", "path ", "debug", "persistent", "lb", "limit")):
+        if CONFIG_COMMAND_RE.match(args):
             await handle_config_command(ctx, args, "cobaltgif")
             return
         
@@ -1159,12 +2070,6 @@ def unified_cobalt_script():
             await ctx.send("❌ Please provide a URL to download and convert.")
             return
         
-        # Validate that the first word is a URL before parsing
-        first_word = args.split()[0].lower()
-        if first_word in ["url", "path", "debug", "persistent", "lb", "limit", "status"]:
-            await handle_config_command(ctx, args, "cobaltgif")
-            return
-        
         parsed_args = parse_gif_args(args)
         url_to_download = parsed_args["url"]
         
@@ -1172,7 +2077,15 @@ def unified_cobalt_script():
             await ctx.send("❌ Could not parse URL from arguments.")
             return
         
+        # Reject a bad time range before anything is downloaded
+        try:
+            time_args, _ = time_range_args(parsed_args["time"])
+        except Exception as e:
+            await ctx.send(f"❌ {str(e)}")
+            return
+        
         msg = await ctx.send(f"⏳ Processing {url_to_download}...")
+        warm_workers()
         
         try:
             # Step 1: Download video
@@ -1186,78 +2099,35 @@ def unified_cobalt_script():
             
             # Step 2: Convert to GIF
             await msg.edit(content="⏳ Converting to GIF...")
-            gif_path, final_size, original_size, should_upload = await convert_to_gif(
+            gif_path, final_size, original_size, _ = await convert_to_gif(
                 video_path,
                 parsed_args["fps"],
                 parsed_args["scale"],
-                parsed_args["time"],
+                time_args,
                 parsed_args["optimize"],
                 parsed_args["speed"]  # Add speed parameter
             )
             
             # Step 3: Send the GIF
-            await msg.edit(content="⏳ Sending GIF...")
-
-            try:
-                if should_upload:
-                    await msg.edit(content="⏳ GIF exceeds Discord limit, uploading to litterbox.catbox.moe...")
-                    try:
-                        litterbox_url = await upload_to_litterbox(gif_path)
-                        size_info = f"GIF Size: {final_size:.2f}MB"
-                        if original_size is not None:
-                            size_reduction = ((original_size - final_size) / original_size) * 100
-                            size_info += f" (Reduced by {size_reduction:.1f}%)"
-                        await ctx.send(f"{size_info}\n📁 Uploaded to: {litterbox_url}\n⚠️ Note: This link will expire in {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')}")
-                        await msg.delete()
-                    except Exception as upload_error:
-                        await msg.edit(content=f"❌ Failed to upload to litterbox: {str(upload_error)}")
-                else:
-                    if original_size is not None:
-                        size_reduction = ((original_size - final_size) / original_size) * 100
-                        await ctx.send(f"GIF Size: {final_size:.2f}MB (Reduced by {size_reduction:.1f}%)", file=discord.File(gif_path))
-                    else:
-                        await ctx.send(f"GIF Size: {final_size:.2f}MB", file=discord.File(gif_path))
-                    await msg.delete()
-            except Exception as e:
-                if "413 Payload Too Large" in str(e):
-                    await msg.edit(content="⏳ GIF exceeds Discord limit, uploading to litterbox.catbox.moe...")
-                    try:
-                        litterbox_url = await upload_to_litterbox(gif_path)
-                        size_info = f"GIF Size: {final_size:.2f}MB"
-                        if original_size is not None:
-                            size_reduction = ((original_size - final_size) / original_size) * 100
-                            size_info += f" (Reduced by {size_reduction:.1f}%)"
-                        await ctx.send(f"{size_info}\n📁 Uploaded to: {litterbox_url}\n⚠️ Note: This link will expire in {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')}")
-                        await msg.delete()
-                    except Exception as upload_error:
-                        await msg.edit(content=f"❌ Failed to upload to litterbox: {str(upload_error)}")
-                else:
-                    raise
+            caption = f"GIF Size: {final_size:.2f}MB"
+            if original_size is not None:
+                size_reduction = ((original_size - final_size) / original_size) * 100
+                caption += f" (Reduced by {size_reduction:.1f}%)"
+            await deliver_file(ctx, msg, gif_path, int(final_size * BYTES_PER_MB), caption)
             
             # Clean up if not persistent
-            if not getConfigData().get(PERSISTENT_STORAGE_KEY, False):
-                try:
-                    os.remove(video_path)
-                    os.remove(gif_path)
-                    debug_log("Temporary files deleted", type_="SUCCESS")
-                except Exception as e:
-                    debug_log(f"Error deleting temporary files: {str(e)}", type_="ERROR")
+            if not keep_files:
+                cleanup_files(video_path, gif_path)
         
         except Exception as e:
             error_str = str(e)
-            if "413 Payload Too Large" in error_str:
-                limit_mb = getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8)
-                user_msg = f"❌ GIF exceeds Discord's {limit_mb}MB limit. Try using -optimize, reducing quality, or shortening duration."
-            elif "invalid or not supported by Cobalt" in error_str:
-                user_msg = "❌ The URL you provided is invalid or not supported by Cobalt. Please check the URL and try again."
-            elif "website is not supported by Cobalt" in error_str:
-                user_msg = "❌ This website is not supported by Cobalt. Please try a different URL."
-            elif "content is private or requires authentication" in error_str:
-                user_msg = "❌ This content is private or requires authentication. Cobalt cannot access it."
-            else:
-                user_msg = f"❌ Error: {error_str}"
-                if "0 bytes" in error_str:
-                    user_msg += "\nThis might be due to anti-bot measures. Try again in a few minutes."
+            fallback = f"❌ Error: {error_str}"
+            if "0 bytes" in error_str:
+                fallback += "\nThis might be due to anti-bot measures. Try again in a few minutes."
+            user_msg = error_message(
+                error_str, f"❌ GIF exceeds Discord's {lb_limit_mb}MB limit. Try using -optimize, reducing quality, or shortening duration.",
+                COBALT_ERROR_RE, COBALT_ERROR_MESSAGES, fallback
+            )
             debug_log(f"Error: {error_str}", type_="ERROR")
             await msg.edit(content=user_msg)
 
@@ -1267,22 +2137,27 @@ def unified_cobalt_script():
         await ctx.message.delete()
         
         # Handle configuration commands
-        if args.lower().startswith(("url ", "path ", "debug", "persistent", "lb", "limit")):
+        if CONFIG_COMMAND_RE.match(args):
             await handle_config_command(ctx, args, "v2g")
             return
 
         video_path = None
         parsed_args = None
+        result_key = None
+        warm_workers()
 
         # If no args, attempt to use the previous message
         if not args:
-            history = [m async for m in ctx.channel.history(limit=2)]
-            if len(history) < 2:
+            # Take the second message without collecting the history into a list
+            history = ctx.channel.history(limit=2)
+            try:
+                await history.__anext__()
+                prev_msg = await history.__anext__()
+            except StopAsyncIteration:
                 return
-            prev_msg = history[1]
             if prev_msg.attachments:
                 attachment = prev_msg.attachments[0]
-                if not any(attachment.filename.lower().endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm']):
+                if not attachment.filename.lower().endswith(VIDEO_EXTENSIONS):
                     return
                 msg = await ctx.send("downloading attachment from previous message...")
 
@@ -1294,25 +2169,26 @@ def unified_cobalt_script():
 
                     return
             else:
-                match = re.search(r'https?://\S+', prev_msg.content)
-                if match and any(match.group(0).split('?')[0].lower().endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm']):
+                match = MESSAGE_URL_RE.search(prev_msg.content)
+                if match and match.group(0).split('?')[0].lower().endswith(VIDEO_EXTENSIONS):
                     args = match.group(0)
                 else:
                     return
 
-        # Validate that the first word is a URL before parsing
-        first_word = args.split()[0].lower() if args else ""
-        if first_word in ["url", "path", "debug", "persistent", "lb", "limit", "status"]:
-            await handle_config_command(ctx, args, "v2g")
-            return
-
         if parsed_args is None:
             parsed_args = parse_v2g_args(args)
 
+        # Reject a bad time range before anything is downloaded
+        try:
+            time_args, clip_seconds = time_range_args(parsed_args["time"])
+        except Exception as e:
+            await ctx.send(f"❌ {str(e)}")
+            return
+
         # Check for attachment
         if video_path is None and ctx.message.attachments:
             attachment = ctx.message.attachments[0]
-            if not any(attachment.filename.lower().endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm']):
+            if not attachment.filename.lower().endswith(VIDEO_EXTENSIONS):
                 await ctx.send("please attach a video file (mp4, mov, avi, mkv, webm)")
                 return
             
@@ -1323,8 +2199,7 @@ def unified_cobalt_script():
                 await msg.edit(content=f"error downloading attachment: {str(e)}")
                 return
         elif video_path is None:
-            # Handle URL
-            parsed_args = parse_v2g_args(args)
+            # Handle URL (parsed_args was already parsed from args above)
             url_to_download = parsed_args["url"]
             
             if not url_to_download:
@@ -1337,6 +2212,20 @@ def unified_cobalt_script():
                 await ctx.send("twitter/x urls are not supported in direct v2g mode. please use the cobalt gif converter instead:\n`<p>cg <url> [options]`")
                 return
             
+            # A repeat of a recent request resends the GIF it produced
+            if keep_files:
+                # The settings the output depends on are part of the key: -fit
+                # targets the litterbox limit and cuda resizes with scale_cuda
+                result_key = (tuple(sorted(parsed_args.items())), lb_limit_bytes, ffmpeg_hwaccel)
+                cached_gif = v2g_results.pop(result_key, None)
+                cached_bytes = cached_gif and await file_size(cached_gif)
+                if cached_bytes:
+                    debug_log(f"Reusing GIF from an identical request: {cached_gif}", type_="INFO")
+                    v2g_results[result_key] = cached_gif
+                    msg = await ctx.send("sending previous gif...")
+                    await deliver_file(ctx, msg, cached_gif, cached_bytes)
+                    return
+            
             msg = await ctx.send(f"downloading video...")
             try:
                 # Download directly without using Cobalt
@@ -1361,112 +2250,246 @@ def unified_cobalt_script():
         output_dir = ensure_download_dir(persistent=True)
         
         # Generate filename
-        original_filename = os.path.splitext(os.path.basename(video_path))[0]
-        original_filename = re.sub(r'[^\w\-_]', '_', original_filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        gif_filename = f"{original_filename}_{timestamp}.gif"
+        base_name = output_name(video_path)
+        gif_filename = f"{base_name}.gif"
         gif_path = os.path.join(output_dir, gif_filename)
         
-        # Prepare FFmpeg parameters based on flags
-        ffmpeg_params = []
-        
-        # Time parameters
-        if parsed_args["time"]:
-            start_time, end_time = parsed_args["time"].split("-")
-            start_float = float(start_time)
-            end_float = float(end_time)
-            duration = str(end_float - start_float)
-            ffmpeg_params.extend([f"-ss {start_time}", f"-t {duration}"])
-        
-        # Video filter parameters
-        vf_parts = []
-        
-        # Basic filters
-        vf_parts.append(f"fps={parsed_args['fps']}")
-        vf_parts.append(f"scale={parsed_args['scale']}:flags=lanczos")
-        
-        
-        # Palette generation
-        if parsed_args["optimize"]:
-            palette_params = f"palettegen=max_colors={parsed_args['colors']}:reserve_transparent=1"
-            vf_parts.append(f"split[s0][s1];[s0]{palette_params}[p];[s1][p]paletteuse={parsed_args['dither']}")
-        else:
-            vf_parts.append(f"split[s0][s1];[s0]palettegen=max_colors={parsed_args['colors']}[p];[s1][p]paletteuse")
+        # A link that already serves a GIF is sent as is unless an option asks for a re-encode
+        v2g_defaults = parse_v2g_args("")
+        if all(parsed_args[key] == v2g_defaults[key] for key in V2G_ENCODE_OPTIONS) and await is_gif_file(video_path):
+            debug_log("Source is already a GIF, skipping conversion", type_="INFO")
+            try:
+                await asyncio.to_thread(os.replace, video_path, gif_path)
+                await deliver_file(ctx, msg, gif_path, await file_size(gif_path))
+                if not keep_files:
+                    cleanup_files(gif_path)
+            except Exception as e:
+                debug_log(f"Error: {str(e)}", type_="ERROR")
+                await msg.edit(content=f"error: {str(e)}")
+            return
         
-        ffmpeg_params.append(f'-vf "{",".join(vf_parts)}"')
+        # Optimized GIFs drop duplicate frames (held frames keep their time through
+        # longer delays); skipped with -speed, which sets one delay for every frame
+        dedupe = parsed_args["optimize"] and parsed_args["speed"] == 1.0
+        
+        # Long trimmed clips are encoded as parallel segments, each with its own
+        # palette, and merged by gifsicle; -fit needs a single size-capped encode
+        segment_count = 1
+        if clip_seconds and clip_seconds > V2G_SEGMENT_MIN_SECONDS and not parsed_args["fit"]:
+            segment_count = min(docker_jobs, math.ceil(clip_seconds / V2G_SEGMENT_SECONDS))
+        
+        # Longer optimized clips build the palette in a separate, subsampled pass:
+        # the one-pass split graph has to hold every frame in memory until
+        # palettegen sees the end of the clip
+        two_pass = segment_count == 1 and parsed_args["optimize"] and (clip_seconds is None or clip_seconds > V2G_TWO_PASS_MIN_SECONDS)
+        palette_filename = f"{base_name}_palette.png"
+        palette_path = os.path.join(work_dir, palette_filename)
+        if two_pass:
+            palette_fps = min(parsed_args["fps"], V2G_PALETTE_SAMPLE_FPS)
+            palette_width = min(int(parsed_args["scale"].split(":")[0]), V2G_PALETTE_SAMPLE_WIDTH)
+            palette_vf = f"fps={palette_fps},scale={palette_width}:-1:flags=bilinear,palettegen=max_colors={parsed_args['colors']}:reserve_transparent=1"
+        
+        # With persistent storage the palette is kept, and a later run on the same
+        # unchanged source and range (e.g. with another -speed, -dither or -loop)
+        # skips the palette pass
+        palette_key = None
+        palette_cached = False
+        if two_pass and keep_files:
+            source = await asyncio.to_thread(os.stat, video_path)
+            palette_key = (
+                video_path, source.st_size, source.st_mtime_ns, parsed_args["time"],
+                palette_fps, palette_width, parsed_args["colors"]
+            )
+            cached_palette = v2g_palettes.get(palette_key)
+            if cached_palette and await file_size(cached_palette):
+                debug_log(f"Reusing palette: {cached_palette}", type_="INFO")
+                palette_path = cached_palette
+                palette_filename = os.path.basename(cached_palette)
+                palette_cached = True
         
         # Loop parameter
+        loop_args = []
         if parsed_args["loop"] >= 0:
-            ffmpeg_params.append(f"-loop {parsed_args['loop']}")
+            loop_args = ["-loop", str(parsed_args["loop"])]
+        
+        # Speed changes and optimization pipe FFmpeg's GIF straight into
+        # gifsicle instead of writing the GIF and rewriting it in a second container
+        gifsicle_args = []
+        if parsed_args["speed"] != 1.0:
+            base_delay = 100 / parsed_args["fps"]
+            new_delay = max(1, int(round(base_delay / parsed_args["speed"])))
+            gifsicle_args.append(f"--delay={new_delay}")
+        if parsed_args["optimize"]:
+            gifsicle_args.extend(["-O3", "--lossy=80", *GIFSICLE_STRIP_ARGS])
+            if parsed_args["colors"] < 256:
+                gifsicle_args.append(f"--colors={parsed_args['colors']}")
+        pipe_mode = bool(gifsicle_args)
+        
+        _, _, hw_input_args = ffmpeg_docker_settings()
+        ffmpeg_mounts = {"/input": os.path.dirname(video_path)}
+        if two_pass:
+            ffmpeg_mounts["/work"] = work_dir
+        # -fit cuts the GIF off at the size limit instead of encoding the rest and
+        # falling back to litterbox
+        size_args = []
+        if parsed_args["fit"]:
+            size_args = ["-fs", str(int(lb_limit_bytes * V2G_FIT_RATIO))]
+        
+        # With the cuda hwaccel, frames stay on the GPU through the resize and are
+        # only downloaded for the CPU palette filters
+        gpu_scale = ffmpeg_hwaccel == "cuda"
+        
+        # Helper function to build the FFmpeg arguments for the GIF encode
+        def gif_ffmpeg_args(gpu, seek_args=time_args):
+            """Return the FFmpeg arguments for the GIF pass, resizing on the GPU if gpu is set"""
+            input_args = ["-y", *hw_input_args]
+            if gpu:
+                width = parsed_args["scale"].split(":")[0]
+                input_args.extend(["-hwaccel_output_format", "cuda"])
+                vf_parts = [f"scale_cuda={width}:-2", "hwdownload", "format=nv12", f"fps={parsed_args['fps']}"]
+            else:
+                vf_parts = [f"fps={parsed_args['fps']}", f"scale={parsed_args['scale']}:flags=lanczos"]
+            # Seeking on the input skips decoding everything before the start,
+            # which every parallel segment would otherwise repeat
+            input_args.extend([*seek_args, "-i", f"/input/{os.path.basename(video_path)}"])
+            if dedupe:
+                vf_parts.append("mpdecimate")
+            
+            # Palette generation
+            filter_flag = "-vf"
+            if two_pass:
+                # The palette is the second input ([1:v])
+                input_args.extend(["-i", f"/work/{palette_filename}"])
+                filter_flag = "-lavfi"
+                vf_string = ",".join(vf_parts) + f"[x];[x][1:v]paletteuse={parsed_args['dither']}"
+            else:
+                if parsed_args["optimize"]:
+                    palette_params = f"palettegen=max_colors={parsed_args['colors']}:reserve_transparent=1"
+                    vf_parts.append(f"split[s0][s1];[s0]{palette_params}[p];[s1][p]paletteuse={parsed_args['dither']}")
+                else:
+                    vf_parts.append(f"split[s0][s1];[s0]palettegen=max_colors={parsed_args['colors']}[p];[s1][p]paletteuse")
+                vf_string = ",".join(vf_parts)
+            
+            ffmpeg_args = [*input_args, "-threads", ffmpeg_threads, filter_flag, vf_string, *loop_args, *size_args]
+            if dedupe:
+                ffmpeg_args.extend(["-vsync", "vfr"])
+            return ffmpeg_args
+        
+        # Helper function to run the GIF encode
+        async def encode_gif(ffmpeg_args):
+            """Run FFmpeg (piped into gifsicle when needed) to write gif_path"""
+            if pipe_mode:
+                ffmpeg_argv = await tool_argv(
+                    "ffmpeg", ffmpeg_mounts,
+                    [*ffmpeg_args, "-f", "gif", "-"],
+                    readonly=("/input",)
+                )
+                gifsicle_argv = await tool_argv(
+                    "gifsicle", {"/output": output_dir},
+                    ["--no-warnings", *gifsicle_args, "-", "-o", f"/output/{gif_filename}"],
+                    interactive=True
+                )
+                await run_docker_pipeline(ffmpeg_argv, gifsicle_argv)
+            else:
+                ffmpeg_cmd = await tool_argv(
+                    "ffmpeg", {**ffmpeg_mounts, "/output": output_dir},
+                    [*ffmpeg_args, f"/output/{gif_filename}"],
+                    readonly=("/input",)
+                )
+                await run_docker_cmd(ffmpeg_cmd)
+        
+        # Helper function to run the GIF encode as parallel segments
+        async def encode_gif_segments(gpu):
+            """Encode each segment of the time range in its own FFmpeg run and merge them into gif_path"""
+            start = parsed_args["time"][0]
+            segment_seconds = clip_seconds / segment_count
+            part_names = [f"{base_name}_part{i}.gif" for i in range(segment_count)]
+            try:
+                runs = []
+                for i, part_name in enumerate(part_names):
+                    seek_args = ["-ss", str(round(start + i * segment_seconds, 3)), "-t", str(round(segment_seconds, 3))]
+                    ffmpeg_cmd = await tool_argv(
+                        "ffmpeg", {**ffmpeg_mounts, "/work": work_dir},
+                        [*gif_ffmpeg_args(gpu, seek_args), f"/work/{part_name}"],
+                        readonly=("/input",)
+                    )
+                    runs.append(run_docker_cmd(ffmpeg_cmd))
+                # Wait for every run before raising, so none is still writing during cleanup
+                results = await asyncio.gather(*runs, return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+                gifsicle_cmd = await tool_argv(
+                    "gifsicle", {"/work": work_dir, "/output": output_dir},
+                    [
+                        "--no-warnings", "--merge", *gifsicle_args,
+                        *(f"/work/{name}" for name in part_names), "-o", f"/output/{gif_filename}"
+                    ],
+                    readonly=("/work",)
+                )
+                await run_docker_cmd(gifsicle_cmd)
+            finally:
+                await remove_files(*(os.path.join(work_dir, name) for name in part_names))
         
         # Convert to GIF using FFmpeg
         try:
             await msg.edit(content="converting to gif...")
-            ffmpeg_cmd = (
-                f'docker run --rm -v "{os.path.dirname(video_path)}:/input" -v "{output_dir}:/output" jrottenberg/ffmpeg '
-                f'-y -i /input/{os.path.basename(video_path)} '
-                f'{" ".join(ffmpeg_params)} '
-                f'/output/{gif_filename}'
-            )
-            debug_log(f"Running FFmpeg command: {ffmpeg_cmd}", type_="INFO")
-            await run_docker_cmd(ffmpeg_cmd)
-
-            if not os.path.exists(gif_path):
-                raise Exception("GIF file not found")
-
-            # Adjust playback speed by modifying frame delay
-            if parsed_args["speed"] != 1.0:
-                base_delay = 100 / parsed_args["fps"]
-                new_delay = max(1, int(round(base_delay / parsed_args["speed"])))
-                delay_cmd = (
-                    f'docker run --rm -v "{output_dir}:/src" dylanninin/giflossy '
-                    f'gifsicle --batch --no-warnings --delay={new_delay} /src/{gif_filename}'
-                )
-                await run_docker_cmd(delay_cmd)
+            try:
+                if two_pass and not palette_cached:
+                    palette_cmd = await tool_argv(
+                        "ffmpeg", {"/input": os.path.dirname(video_path), "/work": work_dir},
+                        [
+                            # Seek on the input, like the encode, so both passes start
+                            # at the same frame without decoding the skipped part
+                            "-y", *hw_input_args, *time_args, "-i", f"/input/{os.path.basename(video_path)}",
+                            "-threads", ffmpeg_threads,
+                            "-vf", palette_vf, f"/work/{palette_filename}"
+                        ],
+                        readonly=("/input",)
+                    )
+                    await run_docker_cmd(palette_cmd)
+                    if palette_key:
+                        v2g_palettes[palette_key] = palette_path
+                        if len(v2g_palettes) > V2G_PALETTE_CACHE_SIZE:
+                            await remove_files(v2g_palettes.pop(next(iter(v2g_palettes))))
+                try:
+                    if segment_count > 1:
+                        await encode_gif_segments(gpu_scale)
+                    else:
+                        await encode_gif(gif_ffmpeg_args(gpu_scale))
+                except Exception as e:
+                    # Sources NVDEC can't decode arrive as CPU frames, which scale_cuda rejects
+                    if not gpu_scale:
+                        raise
+                    debug_log(f"GPU scaling failed, retrying on the CPU: {e}", type_="ERROR")
+                    if segment_count > 1:
+                        await encode_gif_segments(False)
+                    else:
+                        await encode_gif(gif_ffmpeg_args(False))
+            finally:
+                if two_pass and not palette_key:
+                    await remove_files(palette_path)
 
             # Check size
-            final_size = os.path.getsize(gif_path) / (1024 * 1024)
-            size_threshold = float(getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8))
-            if final_size > size_threshold:
-                await msg.edit(content="gif exceeds discord limit, uploading to litterbox.catbox.moe...")
-                try:
-                    litterbox_url = await upload_to_litterbox(gif_path)
-                    await ctx.send(f"gif uploaded to: {litterbox_url}\nnote: this link will expire in {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')}")
-                    await msg.delete()
-                except Exception as upload_error:
-                    await msg.edit(content=f"failed to upload to litterbox: {str(upload_error)}")
-                return
-            
-            # Send the GIF
-            await msg.edit(content=f"sending gif ({final_size:.2f}mb)...")
-            await ctx.send(file=discord.File(gif_path))
-            await msg.delete()
+            final_bytes = await file_size(gif_path)
+            if final_bytes is None:
+                raise Exception("GIF file not found")
+            await deliver_file(ctx, msg, gif_path, final_bytes)
             
-            # Clean up
-            if not getConfigData().get(PERSISTENT_STORAGE_KEY, False):
-                try:
-                    os.remove(video_path)
-                    os.remove(gif_path)
-                    debug_log("Temporary files deleted", type_="SUCCESS")
-                except Exception as e:
-                    debug_log(f"Error deleting temporary files: {str(e)}", type_="ERROR")
+            # Clean up, or remember the GIF for a repeat of this request
+            if not keep_files:
+                cleanup_files(video_path, gif_path)
+            elif result_key:
+                v2g_results[result_key] = gif_path
+                if len(v2g_results) > V2G_RESULT_CACHE_SIZE:
+                    del v2g_results[next(iter(v2g_results))]
         
         except Exception as e:
             error_str = str(e)
-            if "413 Payload Too Large" in error_str:
-                limit_mb = getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8)
-                user_msg = f"gif exceeds discord's {limit_mb}MB limit. try using -optimize, reducing quality, or shortening duration."
-            elif "Option vf (set video filters) cannot be applied to input url" in error_str:
-                debug_log(f"FFmpeg command error: {error_str}", type_="ERROR")
-                user_msg = "error processing video. please try again with different parameters."
-            elif "Error parsing options for input file" in error_str:
-                debug_log(f"FFmpeg input error: {error_str}", type_="ERROR")
-                user_msg = "error reading video file. please check if the file is valid."
-            elif "Error opening input files" in error_str:
-                debug_log(f"FFmpeg file access error: {error_str}", type_="ERROR")
-                user_msg = "error accessing video file. please try again."
-            else:
-                user_msg = f"error: {error_str}"
+            user_msg = error_message(
+                error_str, f"gif exceeds discord's {lb_limit_mb}MB limit. try using -optimize, reducing quality, or shortening duration.",
+                FFMPEG_ERROR_RE, FFMPEG_ERROR_MESSAGES, f"error: {error_str}"
+            )
             debug_log(f"Error: {error_str}", type_="ERROR")
             await msg.edit(content=user_msg)
 
@@ -1475,16 +2498,17 @@ def unified_cobalt_script():
         """Extract MP3 audio from a video attachment or URL"""
         await ctx.message.delete()
 
-        if args.lower().startswith(("url ", "path ", "debug", "persistent", "lb", "limit")):
+        if CONFIG_COMMAND_RE.match(args):
             await handle_config_command(ctx, args, "v2mp3")
             return
 
         audio_path = None
         video_path = None
+        warm_workers(("ffmpeg",))
 
         if ctx.message.attachments:
             attachment = ctx.message.attachments[0]
-            if not any(attachment.filename.lower().endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm']):
+            if not attachment.filename.lower().endswith(VIDEO_EXTENSIONS):
                 await ctx.send("please attach a video file (mp4, mov, avi, mkv, webm)")
                 return
             msg = await ctx.send("downloading attachment...")
@@ -1498,9 +2522,14 @@ def unified_cobalt_script():
             mp3_filename = os.path.splitext(os.path.basename(video_path))[0] + ".mp3"
             audio_path = os.path.join(output_dir, mp3_filename)
             await msg.edit(content="converting to mp3...")
-            ffmpeg_cmd = (
-                f'docker run --rm -v "{os.path.dirname(video_path)}:/input" -v "{output_dir}:/output" jrottenberg/ffmpeg '
-                f'-y -i /input/{os.path.basename(video_path)} -vn -acodec libmp3lame /output/{mp3_filename}'
+            ffmpeg_cmd = await tool_argv(
+                "ffmpeg", {"/input": os.path.dirname(video_path), "/output": output_dir},
+                [
+                    "-y", "-i", f"/input/{os.path.basename(video_path)}",
+                    "-threads", ffmpeg_threads,
+                    "-vn", "-acodec", "libmp3lame", f"/output/{mp3_filename}"
+                ],
+                readonly=("/input",)
             )
             try:
                 await run_docker_cmd(ffmpeg_cmd)
@@ -1512,11 +2541,6 @@ def unified_cobalt_script():
                 await ctx.send("❌ please provide a url or attach a video file")
                 return
 
-            first_word = args.split()[0].lower()
-            if first_word in ["url", "path", "debug", "persistent", "lb", "limit", "status"]:
-                await handle_config_command(ctx, args, "v2mp3")
-                return
-
             parsed_args = parse_v2mp3_args(args)
             url_to_download = parsed_args["url"]
             if not url_to_download:
@@ -1530,38 +2554,15 @@ def unified_cobalt_script():
                 await msg.edit(content=f"error downloading: {str(e)}")
                 return
 
-        if not audio_path or not os.path.exists(audio_path):
+        file_bytes = await file_size(audio_path) if audio_path else None
+        if file_bytes is None:
             await msg.edit(content="conversion failed")
             return
 
-        file_size = os.path.getsize(audio_path) / (1024 * 1024)
-        size_threshold = float(getConfigData().get(LITTERBOX_SIZE_THRESHOLD_MB_KEY, 8))
-
-        if file_size > size_threshold:
-            await msg.edit(content="uploading to litterbox.catbox.moe...")
-            try:
-                litterbox_url = await upload_to_litterbox(audio_path)
-                await ctx.send(f"📁 file uploaded to: {litterbox_url}\n⚠️ note: this link will expire in {getConfigData().get(LITTERBOX_EXPIRY_KEY, '24h')}")
-                await msg.delete()
-            except Exception as e:
-                await msg.edit(content=f"failed to upload: {str(e)}")
-        else:
-            await msg.edit(content=f"sending file ({file_size:.2f}mb)...")
-            try:
-                await ctx.send(file=discord.File(audio_path))
-                await msg.delete()
-            except Exception as e:
-                await msg.edit(content=f"error sending file: {str(e)}")
+        await deliver_file(ctx, msg, audio_path, file_bytes)
 
-        if not getConfigData().get(PERSISTENT_STORAGE_KEY, False):
-            try:
-                if video_path and os.path.exists(video_path):
-                    os.remove(video_path)
-                if audio_path and os.path.exists(audio_path):
-                    os.remove(audio_path)
-                debug_log("Temporary files deleted", type_="SUCCESS")
-            except Exception as e:
-                debug_log(f"Error deleting temporary files: {str(e)}", type_="ERROR")
+        if not keep_files:
+            cleanup_files(video_path, audio_path)
 
 # Initialize the script
 unified_cobalt_script()